@@ -0,0 +1,73 @@
+# analysis_cache.py
+# analyze_image 결과 캐시 (illegal_vehicle.db의 analysis_cache 테이블, 스키마는 db_manager 마이그레이션 v4)
+# - 키: 이미지 바이트의 sha256 + 프롬프트/모델 버전 → 같은 이미지를 다시 저장한 파일도 API 호출 없이 재사용
+# - 항목이 max_entries를 넘으면 가장 오래 안 쓴 것부터 지움 (LRU)
+import time
+import hashlib
+import threading
+from db_manager import get_db
+
+MAX_ENTRIES = 5000
+
+
+class AnalysisCache:
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    @staticmethod
+    def key(image_bytes, version):
+        return f"{hashlib.sha256(image_bytes).hexdigest()}:{version}"
+
+    def get(self, key):
+        """캐시된 결과 또는 None"""
+        with get_db().reader() as cursor:
+            cursor.execute("SELECT result FROM analysis_cache WHERE key = ?", (key,))
+            row = cursor.fetchone()
+        if row is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        with get_db().writer() as cursor:
+            cursor.execute("UPDATE analysis_cache SET last_used_at = ?, hits = hits + 1 WHERE key = ?",
+                           (time.time(), key))
+        with self._lock:
+            self.hits += 1
+        return row[0]
+
+    def put(self, key, result):
+        now = time.time()
+        with get_db().writer() as cursor:
+            cursor.execute("""INSERT INTO analysis_cache (key, result, created_at, last_used_at) VALUES (?, ?, ?, ?)
+                              ON CONFLICT (key) DO UPDATE SET result = excluded.result, last_used_at = excluded.last_used_at""",
+                           (key, result, now, now))
+            cursor.execute("SELECT COUNT(*) FROM analysis_cache")
+            excess = cursor.fetchone()[0] - self.max_entries
+            if excess > 0:
+                cursor.execute("""DELETE FROM analysis_cache WHERE key IN (
+                                      SELECT key FROM analysis_cache ORDER BY last_used_at LIMIT ?)""", (excess,))
+        if excess > 0:
+            with self._lock:
+                self.evicted += excess
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {"cache_hits": self.hits, "cache_misses": self.misses, "cache_evicted": self.evicted,
+                    "cache_hit_rate": round(self.hits / total, 2) if total else 0.0}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_analysis_cache():
+    """프로세스 전역 AnalysisCache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AnalysisCache()
+        return _cache
@@ -0,0 +1,175 @@
+# analysis_executor.py
+# VLM 분석(chatbot.analyze_image)을 GUI 스레드 밖에서 실행
+# - analyze_image는 수 초 걸리는 네트워크 호출 → 작업 스레드 workers개가 대기열에서 꺼내 실행
+# - 결과/실패/대기열 길이는 시그널로 GUI 스레드에 전달 (Qt가 queued connection으로 넘김)
+#   응답은 스트리밍으로 받아 지금까지 받은 텍스트를 progress로 계속 보냄 (PROGRESS_INTERVAL마다)
+# - 작업 상태/재시도는 analysis_jobs 테이블에 기록 → 재시작하거나 헤드리스 워커와 같이 돌려도 이어서 처리
+# - 대기열은 우선순위 힙: 펼친 행 > 새 탐지 > 화면에 보이는 행 > 이전 기록, 같은 순위면 최신(rowid 큰) 먼저
+#   우선순위를 바꾸면 새 항목을 넣고 이전 항목은 꺼낼 때 버림 (lazy deletion)
+import os
+import time
+import heapq
+import itertools
+import threading
+from PyQt5.QtCore import QObject, pyqtSignal
+from analysis_jobs import claim, run_job, stored_result, worker_name
+
+# 동시에 실행할 분석 수 (실제 API 요청 수/속도는 vlm_client의 VLM_CONCURRENCY/VLM_RPM이 제한)
+ANALYSIS_WORKERS = int(os.getenv('ANALYSIS_WORKERS', '8'))
+
+# 우선순위 (작을수록 먼저)
+PRIORITY_EXPANDED = 0
+PRIORITY_LIVE = 1
+PRIORITY_VISIBLE = 2
+PRIORITY_BACKLOG = 3
+
+PROGRESS_INTERVAL = 0.05    # 스트리밍 중 progress 시그널 최소 간격(초)
+
+
+def analyze_row(rowid, path, on_delta=None):
+    """작업을 점유해서 분석 후 저장한 결과 반환 (작업 스레드에서 호출)
+
+    이미 끝난 작업이면 저장된 결과, 다른 워커가 잡고 있거나 재시도 시각 전이면 None
+    """
+    if not claim(rowid, worker_name()):
+        return stored_result(rowid)
+    return run_job(rowid, path, on_delta=on_delta)
+
+
+class AnalysisExecutor(QObject):
+    started = pyqtSignal(int)               # rowid
+    finished = pyqtSignal(int, str)         # (rowid, 결과)
+    failed = pyqtSignal(int, str)           # (rowid, 오류 메시지)
+    skipped = pyqtSignal(int)               # 지금은 실행할 수 없는 작업 (다른 워커가 처리 중 / 재시도 대기)
+    progress = pyqtSignal(int, str)         # (rowid, 지금까지 받은 텍스트) – 스트리밍 중
+    depth_changed = pyqtSignal(int, int)    # (대기 중, 실행 중)
+
+    def __init__(self, job=analyze_row, workers=ANALYSIS_WORKERS, parent=None):
+        super().__init__(parent)
+        self.job = job
+        self._heap = []                 # (우선순위, -rowid, 순번, rowid)
+        self._jobs = {}                 # rowid -> (우선순위, path, 순번) – 힙에서 유효한 항목
+        self._seq = itertools.count()
+        self._running = set()
+        self._cond = threading.Condition()
+        self._stopped = False
+
+        self.completed = 0
+        self.errors = 0
+
+        self._threads = [threading.Thread(target=self._worker, name=f"analysis-{i}", daemon=True)
+                         for i in range(max(1, workers))]
+        for t in self._threads:
+            t.start()
+
+    @property
+    def workers(self):
+        return len(self._threads)
+
+    def _push(self, rowid, path, priority):
+        seq = next(self._seq)
+        self._jobs[rowid] = (priority, path, seq)
+        heapq.heappush(self._heap, (priority, -rowid, seq, rowid))
+
+    def submit(self, rowid, path, priority=PRIORITY_BACKLOG):
+        """대기열에 추가 (이미 대기 중이면 우선순위만 올림, 실행 중이면 False)"""
+        with self._cond:
+            if self._stopped or rowid in self._running:
+                return False
+            queued = self._jobs.get(rowid)
+            if queued is not None:
+                if priority < queued[0]:
+                    self._push(rowid, path, priority)
+                return False
+            self._push(rowid, path, priority)
+            self._cond.notify()
+        self._emit_depth()
+        return True
+
+    def set_priority(self, rowid, priority):
+        """대기 중인 작업의 우선순위 변경 (올리거나 내림)"""
+        with self._cond:
+            queued = self._jobs.get(rowid)
+            if queued is None or queued[0] == priority:
+                return False
+            self._push(rowid, queued[1], priority)
+            return True
+
+    def priority_of(self, rowid):
+        """대기 중이면 우선순위, 아니면 None"""
+        with self._cond:
+            queued = self._jobs.get(rowid)
+            return queued[0] if queued else None
+
+    def depth(self):
+        """(대기 중, 실행 중)"""
+        with self._cond:
+            return len(self._jobs), len(self._running)
+
+    def _emit_depth(self):
+        self.depth_changed.emit(*self.depth())
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._stopped and not self._jobs:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                _, _, seq, rowid = heapq.heappop(self._heap)
+                queued = self._jobs.get(rowid)
+                if queued is None or queued[2] != seq:
+                    continue    # 우선순위가 바뀐 이전 항목
+                path = self._jobs.pop(rowid)[1]
+                self._running.add(rowid)
+            self._emit_depth()
+            self.started.emit(rowid)
+            try:
+                result = self.job(rowid, path, self._progress_emitter(rowid))
+                if result is None:
+                    self.skipped.emit(rowid)
+                else:
+                    self.completed += 1
+                    self.finished.emit(rowid, result)
+            except Exception as e:
+                self.errors += 1
+                print(f"❌ 분석 실패 (id={rowid}): {e}")
+                self.failed.emit(rowid, str(e))
+            finally:
+                with self._cond:
+                    self._running.discard(rowid)
+                self._emit_depth()
+
+    def _progress_emitter(self, rowid):
+        """스트리밍 조각을 모아서 PROGRESS_INTERVAL마다 progress(rowid, 누적 텍스트) 발신"""
+        parts = []
+        last = [0.0]
+
+        def on_delta(delta):
+            parts.append(delta)
+            now = time.monotonic()
+            if now - last[0] >= PROGRESS_INTERVAL or "\n" in delta:
+                last[0] = now
+                self.progress.emit(rowid, "".join(parts))
+
+        return on_delta
+
+    def stats(self):
+        queued, running = self.depth()
+        return {"analysis_queued": queued, "analysis_running": running, "analysis_completed": self.completed,
+                "analysis_errors": self.errors}
+
+    def shutdown(self, timeout=2.0):
+        """대기열을 비우고 작업 스레드 종료 (실행 중인 호출은 모든 스레드를 합쳐 timeout까지만 기다림)
+
+        시간 안에 안 끝난 호출은 데몬 스레드로 남고, 결과 저장은 close_db() 뒤라 실패함
+        → 작업은 리스가 만료된 뒤 다음 실행 때 다시 처리됨
+        """
+        with self._cond:
+            self._stopped = True
+            self._jobs.clear()
+            self._heap.clear()
+            self._cond.notify_all()
+        deadline = time.monotonic() + timeout
+        for t in self._threads:
+            t.join(max(0.0, deadline - time.monotonic()))
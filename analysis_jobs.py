@@ -0,0 +1,182 @@
+# analysis_jobs.py
+# VLM 분석 작업 큐 (SQLite analysis_jobs 테이블, 스키마는 db_manager 마이그레이션 v3)
+# - 상태: pending → running (lease_until까지 점유) → done
+#   실패하면 attempts가 MAX_ATTEMPTS 미만이면 지수 백오프 후 다시 pending, 아니면 failed
+# - 프로세스가 죽어 리스가 만료된 running 작업은 다른 워커가 다시 가져감
+# - GUI(AnalysisExecutor)와 헤드리스 워커(python analysis_jobs.py) 어느 쪽이든 같은 큐를 비울 수 있음
+import os
+import time
+import uuid
+import random
+import socket
+import threading
+from chatbot import analyze_image
+from db_manager import get_db
+from vlm_preprocess import parse_bbox
+
+LEASE_SECONDS = 120         # 분석 한 건에 걸릴 수 있는 최대 시간
+MAX_ATTEMPTS = 5
+RETRY_BASE = 10.0           # 첫 재시도 대기(초), 실패할 때마다 2배
+RETRY_MAX = 600.0
+POLL_INTERVAL = 5.0         # 헤드리스 워커가 빈 큐를 다시 볼 간격(초)
+
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+
+
+def _claimable(alias=""):
+    """지금 가져갈 수 있는 작업: 재시도 시각이 된 pending + 리스가 만료된 running"""
+    p = f"{alias}." if alias else ""
+    return (f"(({p}state = 'pending' AND {p}next_attempt_at <= :now) OR "
+            f"({p}state = 'running' AND {p}lease_until < :now))")
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def retry_delay(attempts):
+    """attempts번 실패한 뒤 다음 시도까지 대기(초) – 지수 백오프 + 지터"""
+    delay = min(RETRY_MAX, RETRY_BASE * 2 ** max(0, attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def due_jobs(now=None):
+    """지금 실행할 수 있는 작업 [(vehicle_id, image_path), ...] – 재시작 시 이어서 할 작업도 이 쿼리 하나로"""
+    with get_db().reader() as cursor:
+        cursor.execute(f"""SELECT j.vehicle_id, v.image_path FROM analysis_jobs j
+                           JOIN illegal_vehicles v ON v.id = j.vehicle_id
+                           WHERE {_claimable("j")}
+                           ORDER BY j.vehicle_id DESC""", {"now": now or time.time()})
+        return cursor.fetchall()
+
+
+def claim(vehicle_id, owner, lease=LEASE_SECONDS):
+    """특정 행의 작업을 점유 (이미 끝났거나, 다른 워커가 잡고 있거나, 재시도 시각 전이면 False)"""
+    now = time.time()
+    with get_db().writer() as cursor:
+        cursor.execute(f"""UPDATE analysis_jobs SET state = 'running', owner = :owner, lease_until = :lease,
+                               attempts = attempts + 1, updated_at = :now
+                           WHERE vehicle_id = :vid AND {_claimable()}""",
+                       {"owner": owner, "lease": now + lease, "now": now, "vid": vehicle_id})
+        return cursor.rowcount == 1
+
+
+def claim_next(owner, limit=1, lease=LEASE_SECONDS):
+    """가져갈 수 있는 작업을 최신 행부터 limit개 점유 → [(vehicle_id, image_path), ...]"""
+    now = time.time()
+    token = f"{owner}:{uuid.uuid4().hex[:8]}"   # 이번에 잡은 행만 다시 읽기 위한 표시
+    with get_db().writer() as cursor:
+        cursor.execute(f"""UPDATE analysis_jobs SET state = 'running', owner = :owner, lease_until = :lease,
+                               attempts = attempts + 1, updated_at = :now
+                           WHERE id IN (SELECT id FROM analysis_jobs WHERE {_claimable()}
+                                        ORDER BY vehicle_id DESC LIMIT :limit)""",
+                       {"owner": token, "lease": now + lease, "now": now, "limit": limit})
+        cursor.execute("""SELECT j.vehicle_id, v.image_path FROM analysis_jobs j
+                          JOIN illegal_vehicles v ON v.id = j.vehicle_id
+                          WHERE j.owner = ? AND j.state = 'running'""", (token,))
+        return cursor.fetchall()
+
+
+def complete(vehicle_id, result):
+    """결과 저장 + 작업 완료 (한 트랜잭션)"""
+    with get_db().writer() as cursor:
+        cursor.execute("UPDATE illegal_vehicles SET analysis_result = ? WHERE id = ?", (result, vehicle_id))
+        cursor.execute("""UPDATE analysis_jobs SET state = 'done', lease_until = NULL, last_error = NULL, updated_at = ?
+                          WHERE vehicle_id = ?""", (time.time(), vehicle_id))
+
+
+def fail(vehicle_id, error):
+    """실패 기록 → (새 상태, 다음 시도까지 대기 초 또는 None)"""
+    now = time.time()
+    with get_db().writer() as cursor:
+        cursor.execute("SELECT attempts FROM analysis_jobs WHERE vehicle_id = ?", (vehicle_id,))
+        row = cursor.fetchone()
+        attempts = row[0] if row else MAX_ATTEMPTS
+        if attempts >= MAX_ATTEMPTS:
+            state, delay = FAILED, None
+        else:
+            state, delay = PENDING, retry_delay(attempts)
+        cursor.execute("""UPDATE analysis_jobs SET state = ?, next_attempt_at = ?, lease_until = NULL,
+                              last_error = ?, updated_at = ?
+                          WHERE vehicle_id = ?""", (state, now + (delay or 0), str(error)[:500], now, vehicle_id))
+    return state, delay
+
+
+def stored_result(vehicle_id):
+    """완료된 작업이면 저장된 결과, 아니면 None"""
+    with get_db().reader() as cursor:
+        cursor.execute("""SELECT v.analysis_result FROM analysis_jobs j JOIN illegal_vehicles v ON v.id = j.vehicle_id
+                          WHERE j.vehicle_id = ? AND j.state = 'done'""", (vehicle_id,))
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def roi_of(vehicle_id):
+    """증거 이미지 안의 차량 박스 (기록이 없으면 None)"""
+    with get_db().reader() as cursor:
+        cursor.execute("SELECT bbox FROM illegal_vehicles WHERE id = ?", (vehicle_id,))
+        row = cursor.fetchone()
+    return parse_bbox(row[0]) if row else None
+
+
+def run_job(vehicle_id, path, analyze=analyze_image, on_delta=None):
+    """점유한 작업 하나 실행 (실패하면 재시도 일정을 기록하고 예외를 다시 던짐)
+
+    on_delta를 주면 스트리밍 응답 조각을 그대로 넘김
+    """
+    try:
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        kwargs = {"on_delta": on_delta} if on_delta else {}
+        result = analyze(path, roi=roi_of(vehicle_id), **kwargs)
+    except Exception as e:
+        state, delay = fail(vehicle_id, e)
+        retry = f"{delay:.0f}초 뒤 재시도" if delay is not None else "재시도 안 함"
+        print(f"❌ 분석 실패 (id={vehicle_id}, {state}, {retry}): {e}")
+        raise
+    print(result)
+    complete(vehicle_id, result)
+    return result
+
+
+def counts():
+    with get_db().reader() as cursor:
+        cursor.execute("SELECT state, COUNT(*) FROM analysis_jobs GROUP BY state")
+        return dict(cursor.fetchall())
+
+
+def drain(workers=2, stop=None, poll=POLL_INTERVAL, analyze=analyze_image):
+    """헤드리스 워커: stop이 설정될 때까지 작업을 가져와 실행 (작업 스레드 목록 반환)"""
+    stop = stop or threading.Event()
+
+    def loop():
+        owner = worker_name()
+        while not stop.is_set():
+            jobs = claim_next(owner)
+            if not jobs:
+                stop.wait(poll)
+                continue
+            for vehicle_id, path in jobs:
+                try:
+                    run_job(vehicle_id, path, analyze)
+                except Exception:
+                    pass    # run_job이 재시도 일정을 기록함
+
+    threads = [threading.Thread(target=loop, name=f"analysis-drain-{i}", daemon=True) for i in range(workers)]
+    for t in threads:
+        t.start()
+    return threads
+
+
+if __name__ == "__main__":
+    stop = threading.Event()
+    threads = drain(int(os.getenv('ANALYSIS_WORKERS', '8')), stop)
+    print(f"🧠 분석 워커 시작: {counts()}")
+    try:
+        while True:
+            time.sleep(30)
+            print(f"🧠 분석 작업 현황: {counts()}")
+    except KeyboardInterrupt:
+        stop.set()
+        for t in threads:
+            t.join(LEASE_SECONDS)
@@ -14,10 +14,11 @@ from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QPixmap
 from dotenv import load_dotenv
 from chatbot import analyze_image
-from Detection.detector import load_model, detect_vehicles
+from Detection.detector import detect_vehicles
 from Detection.tracker import init_tracker, update_tracks
 from Detection.db import save_illegal_vehicle, init_db, is_already_saved
 from Detection.utils import match_with_track
+from inference_backend import load_detection_model
 
 os.add_dll_directory(r"C:\Program Files\VideoLAN\VLC") # vlc경로 확인해서 고쳐주세요!!
 load_dotenv()
@@ -30,7 +31,7 @@ class DetectionWorker(threading.Thread):
         self.stream_url = stream_url
         self.cctvname = cctvname
         self.running = True
-        self.model = load_model("Detection/model/yolov8_n.pt").to('cuda')
+        self.model = load_detection_model("Detection/model/yolov8_n.pt")  # GPU 없으면 CPU 백엔드로
         self.tracker = init_tracker()
 
     def run(self):
@@ -4,77 +4,263 @@ import vlc
 import os
 import sqlite3
 import threading
-import cv2
+import time
+import traceback
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
-    QFrame, QTextEdit, QLabel, QInputDialog, QTabWidget, QListWidget,
-    QListWidgetItem, QFileDialog, QMessageBox, QScrollArea, 
+    QFrame, QLabel, QInputDialog, QTabWidget, QListWidget,
+    QListWidgetItem, QFileDialog, QMessageBox,
 )
 
 
 from PyQt5.QtCore import Qt, QObject, pyqtSignal, QTimer
-from PyQt5.QtGui import QPixmap, QIcon
+from PyQt5.QtGui import QIcon
 from dotenv import load_dotenv
-from chatbot import analyze_image
-from Detection.detector import load_model, detect_vehicles
-from Detection.tracker import init_tracker, update_tracks
-from Detection.db import save_illegal_vehicle, init_db, is_already_saved
-from Detection.utils import match_with_track
+from Detection.detector import detect_vehicles
+from db_manager import get_db, close_db
+from model_pool import get_model_pool, MODEL_PATH
+from frame_sampler import FrameSampler
+from motion_gate import MotionGate
+from detection_pipeline import StreamPipeline
+from evidence_writer import stop_evidence_writer
+from frame_grabber import FrameGrabber
+from vlc_frames import VlcFrameSource, VideoSurface, VlcStreamSupervisor
+from batch_inference import get_batch_scheduler, stop_batch_scheduler
+from concurrent.futures import CancelledError, TimeoutError as FutureTimeout
+from detection_process import DetectionEngine
+from detection_list import DetectionListModel, DetectionListView, RowIdRole, PathRole, AnalysisDueRole
+from analysis_executor import AnalysisExecutor, PRIORITY_EXPANDED, PRIORITY_LIVE, PRIORITY_VISIBLE, PRIORITY_BACKLOG
+from analysis_jobs import due_jobs
+from chatbot import analysis_stats
+
+# 새 탐지 시그널을 모아서 한 번에 반영하는 간격(ms)
+DETECTION_FLUSH_MS = 200
+# 재시도 시각이 된 분석 작업을 다시 대기열에 넣는 간격(ms)
+ANALYSIS_RESUME_MS = 30000
+# 스트림 상태(실효 fps, 버린/오래된 프레임, 스킵, 지연) 화면 갱신 간격(ms)
+STATS_INTERVAL_MS = 1000
+# 전체 통계(탐지/저장/썸네일/분석/VLM)를 콘솔에 남기는 간격(ms)
+STATS_LOG_MS = 60000
+# 배치 추론 결과를 기다리는 중 워커 중지/스케줄러 생존을 확인하는 간격(초)
+DETECT_POLL = 0.5
 
 os.add_dll_directory(r"C:\Program Files\VLC") # vlc경로 확인해서 고쳐주세요!!
 load_dotenv()
 api_key = os.getenv('ITS_API_KEY')
+# 1이면 VLC가 디코딩한 프레임을 탐지에도 그대로 사용 (스트림을 한 번만 연다)
+SHARED_DECODE = os.getenv('SHARED_DECODE', '1') == '1'
+# process: 탐지/추적/DB 저장을 별도 프로세스에서 (GUI 프로세스는 화면만), thread: 기존 방식
+DETECTION_ENGINE = os.getenv('DETECTION_ENGINE', 'process')
+
+
+def fetch_cctv_list():
+    api_url = f"https://openapi.its.go.kr:9443/cctvInfo?apiKey={api_key}&type=ex&cctvType=1&minX=126.8&maxX=126.9&minY=36.7&maxY=37.0&getType=json"
+    response = requests.get(api_url, timeout=10)
+    data = response.json()
+    return data['response']['data']
+
+
+def resolve_cctv_url(cctvname):
+    """ITS 목록에서 cctvname의 최신 cctvurl 조회 (토큰 만료 시 재연결용)"""
+    for cctv in fetch_cctv_list():
+        if cctv['cctvname'] == cctvname:
+            return cctv['cctvurl']
+    return None
+
+
+def format_stream_stats(stats):
+    """워커 stats() → 상태 표시줄 한 줄"""
+    return (f"추론 {stats.get('effective_fps', 0.0):.1f}/{stats.get('target_fps', 0.0):.0f}fps ({stats.get('mode', '-')})"
+            f" · 스킵 정지 {stats.get('skipped_frozen', 0)} / 변화없음 {stats.get('skipped_static', 0)}"
+            f" · 버림 {stats.get('dropped', 0) + stats.get('slot_full_dropped', 0)} / 지연됨 {stats.get('stale', 0)}"
+            f" · 지연 {stats.get('latency_ms', 0.0):.0f}ms (최대 {stats.get('latency_ms_max', 0.0):.0f})")
 
 
 class WorkerSignals(QObject):
-    detection_made = pyqtSignal()
+    detection_made = pyqtSignal(int, str, str, str)    # (rowid, image_path, cctvname, timestamp)
+    stream_state = pyqtSignal(str, str)     # (cctvname, live/reconnecting/dead)
+    engine_error = pyqtSignal(str)          # 탐지 프로세스 종료 / 스트림 연결 실패
 
 class DetectionWorker(threading.Thread):
-    def __init__(self, stream_url, cctvname, signal_handler=None):
+    def __init__(self, stream_url, cctvname, signal_handler=None, resolve_url=None, frame_source=None,
+                 scheduler=None):
         super().__init__()
         self.stream_url = stream_url
         self.cctvname = cctvname
+        self.resolve_url = resolve_url
+        self.slot = frame_source       # VLC 공유 버퍼를 쓰면 따로 캡처하지 않음
+        self.scheduler = scheduler     # 있으면 다른 스트림과 묶어서 배치 추론
         self.running = True
-        self.model = load_model("Detection/model/yolov8_n.pt").to("cuda")
-        self.tracker = init_tracker()
+        self.model_handle = None
+        self.pipeline = StreamPipeline(cctvname, on_saved=self.on_saved)  # 🔹 추적 → 매칭 → 저장 큐
+        self.sampler = FrameSampler()  # 🔹 스트림별 적응형 추론 주기
+        self.gate = MotionGate.for_camera(cctvname)  # 🔹 변화 없는/멈춘 프레임 거르기
+        self.grabber = None
+        self.latency_ms = 0.0          # 캡처 → 탐지 완료까지 지연 (최근값)
+        self.latency_ms_max = 0.0
         self.signals = signal_handler  # 🔹 새로 추가된 시그널 핸들러
 
     def run(self):
-        conn, cursor = init_db()
-        cap = cv2.VideoCapture(self.stream_url)
+        # 🔹 모델은 공유 풀에서 빌려옴 (GUI 스레드에서 로드하지 않음)
+        if self.scheduler:
+            self.scheduler.register(self)
+        else:
+            self.model_handle = get_model_pool().acquire(MODEL_PATH)
+        # 🔹 캡처는 별도 스레드, 여기서는 항상 가장 최신 프레임만 처리
+        if self.slot is None:
+            self.grabber = FrameGrabber(self.stream_url, resolve_url=self.resolve_url,
+                                        on_state=self.report_state)
+            self.slot = self.grabber.slot
+            self.grabber.start()
+        last_seq = 0
         try:
-            while self.running and cap.isOpened():
-                ret, frame = cap.read()
-                if not ret:
+            while self.running and not self.slot.closed:
+                last_seq, frame, captured_at = self.slot.get(last_seq, timeout=0.5)
+                if frame is None:
+                    continue
+                if not self.sampler.should_infer():
+                    continue
+                if not self.gate.check(frame):
+                    self.sampler.mark_skipped()
+                    continue
+
+                try:
+                    detections, illegal_boxes = self.detect(frame)
+                except CancelledError:
+                    continue
+                except Exception as e:
+                    if self.scheduler and not (self.scheduler.running and self.scheduler.is_alive()):
+                        # 스케줄러가 멈춤(모델 로드 실패 등) → 이 스트림 탐지 중지하고 GUI에 알림
+                        print(f"❌ [{self.cctvname}] 탐지 중지: {e}")
+                        if self.signals:
+                            self.signals.engine_error.emit(f"[{self.cctvname}] 탐지 중지: {e}")
+                        break
+                    traceback.print_exc()
                     continue
 
-                detections, illegal_boxes = detect_vehicles(self.model, frame, conf_threshold=0.5)
+                try:
+                    _, num_tracks, num_candidates = self.pipeline.process(frame, detections, illegal_boxes)
+                except Exception:
+                    # 프레임 하나의 처리 오류로 탐지 스레드가 죽지 않도록 (process 모드와 같은 처리)
+                    traceback.print_exc()
+                    continue
+                self.sampler.update(num_tracks, num_candidates)
+                self.latency_ms = (time.monotonic() - captured_at) * 1000
+                self.latency_ms_max = max(self.latency_ms_max, self.latency_ms)
 
-                tracks = update_tracks(self.tracker, detections)
+        finally:
+            if self.grabber:
+                self.grabber.stop()
+                self.grabber.join(timeout=2.0)  # 스트림이 멈춰 read()에 걸려 있어도 GUI는 안 막히게
+            if self.scheduler:
+                self.scheduler.unregister(self)
+            else:
+                self.model_handle.release()
+
+    def detect(self, frame):
+        if self.scheduler:
+            # 결과를 기다리면서도 워커 중지/스케줄러 종료를 확인 (join()하는 GUI 스레드가 막히지 않게)
+            future = self.scheduler.submit(self, frame)
+            while True:
+                try:
+                    return future.result(timeout=DETECT_POLL)
+                except FutureTimeout:
+                    if not self.running:
+                        future.cancel()
+                        raise CancelledError()
+                    if not self.scheduler.is_alive():
+                        raise RuntimeError("배치 추론 스케줄러가 응답 없이 종료됨")
+        return detect_vehicles(self.model_handle.model, frame, conf_threshold=0.5)
+
+    def on_saved(self, rowid, timestamp, path, cctvname, track_id):
+        # 🔹 증거가 DB에 커밋되면 시그널 발신 (EvidenceWriter 스레드에서 호출됨)
+        if self.signals:
+            self.signals.detection_made.emit(rowid, path, cctvname, timestamp)
+
+    def report_state(self, state):
+        if self.signals:
+            self.signals.stream_state.emit(self.cctvname, state)
+
+    def stats(self):
+        """스트림 상태 (실효 추론 fps, 버린/오래된 프레임 수, 지연)"""
+        stats = {"cctvname": self.cctvname, **self.sampler.stats(), **self.gate.stats(), **self.pipeline.stats()}
+        if self.slot:
+            stats.update(self.slot.stats())
+        if self.scheduler:
+            stats["batch"] = self.scheduler.stats()
+        stats["latency_ms"] = round(self.latency_ms, 1)
+        stats["latency_ms_max"] = round(self.latency_ms_max, 1)
+        return stats
 
-                for box in illegal_boxes:
-                    matched_id = match_with_track(box, tracks)
-                    if matched_id and not is_already_saved(cursor, matched_id):
-                        save_illegal_vehicle(frame, box, matched_id, cursor, conn, self.cctvname)
+    def stop(self):
+        self.running = False
 
-                        # 🔹 탐지되었을 때 시그널 발신
-                        if self.signals:
-                            self.signals.detection_made.emit()
 
+class ProcessDetectionWorker(threading.Thread):
+    """탐지는 DetectionEngine 프로세스에서 하고, 여기서는 최신 프레임을 넘겨주기만 함"""
+
+    def __init__(self, engine, stream_url, cctvname, signal_handler=None, resolve_url=None, frame_source=None):
+        super().__init__()
+        self.engine = engine
+        self.stream_url = stream_url
+        self.cctvname = cctvname
+        self.resolve_url = resolve_url
+        self.slot = frame_source
+        self.running = True
+        self.grabber = None
+        self.feeder = None
+        self.signals = signal_handler
+
+    def run(self):
+        self.feeder = self.engine.open_stream(self.cctvname, on_detection=self.on_detection)
+        if self.slot is None:
+            self.grabber = FrameGrabber(self.stream_url, resolve_url=self.resolve_url,
+                                        on_state=self.report_state)
+            self.slot = self.grabber.slot
+            self.grabber.start()
+        last_seq = 0
+        try:
+            while self.running and not self.slot.closed:
+                last_seq, frame, captured_at = self.slot.get(last_seq, timeout=0.5)
+                if frame is None:
+                    continue
+                if self.feeder.sampler.should_infer() and not self.feeder.submit(frame, captured_at):
+                    self.feeder.sampler.mark_unsent()   # 못 보낸 프레임은 실효 fps에서 빼기
         finally:
-            cap.release()
-            conn.close()
+            if self.grabber:
+                self.grabber.stop()
+                self.grabber.join(timeout=2.0)
+            self.feeder.close()
+
+    def on_detection(self, rowid, timestamp, path, cctvname, track_id):
+        # 결과 수신 스레드에서 호출됨
+        if self.signals:
+            self.signals.detection_made.emit(rowid, path, cctvname, timestamp)
+
+    def report_state(self, state):
+        if self.signals:
+            self.signals.stream_state.emit(self.cctvname, state)
+
+    def stats(self):
+        stats = {"cctvname": self.cctvname}
+        if self.feeder:
+            stats.update(self.feeder.stats())
+        if self.slot:
+            stats.update(self.slot.stats())
+        return stats
 
     def stop(self):
         self.running = False
 
 
-
 class CCTVViewer(QWidget):
-    def __init__(self, signals):
+    def __init__(self, signals, shared_decode=SHARED_DECODE, engine=None):
         super().__init__()
         self.signals = signals
+        self.engine = engine
         self.worker = None
+        self.shared_decode = shared_decode
+        self.current_name = None
 
         # 버튼 레이아웃 (외부에서 접근하려고 속성으로 선언)
         self.button_layout = QVBoxLayout()
@@ -86,9 +272,22 @@ class CCTVViewer(QWidget):
             btn.clicked.connect(lambda _, url=cctv['cctvurl'], name=cctv['cctvname']: self.play_stream(url, name))
             self.button_layout.addWidget(btn)
 
+        self.instance = vlc.Instance()
+        self.player = self.instance.media_player_new()
+
         # 영상 표시 프레임
-        self.video_frame = QFrame()
-        self.video_frame.setStyleSheet("background-color: #000; border-radius: 24px;")
+        if self.shared_decode:
+            # 🔹 VLC 프레임을 메모리로 받아 직접 그림 (탐지와 같은 버퍼 사용)
+            self.frame_source = VlcFrameSource(self.player)
+            self.video_frame = VideoSurface(self.frame_source.shared)
+            # 🔹 오류/종료/프레임 끊김 시 백오프 재연결 + URL 재조회 (cv2 경로의 StreamSupervisor 역할)
+            self.supervisor = VlcStreamSupervisor(self.instance, self.player, self.frame_source.shared,
+                                                  on_state=self.emit_player_state, parent=self)
+        else:
+            self.frame_source = None
+            self.supervisor = None
+            self.video_frame = QFrame()
+            self.video_frame.setStyleSheet("background-color: #000; border-radius: 24px;")
 
         # 영상 재생 버튼
         self.play_button = QPushButton("URL로 영상 재생")
@@ -100,33 +299,48 @@ class CCTVViewer(QWidget):
         self.stop_button.setFixedHeight(40)
         self.stop_button.clicked.connect(self.stop_stream)
 
-        self.instance = vlc.Instance()
-        self.player = self.instance.media_player_new()
-        if sys.platform.startswith("linux"):
-            self.player.set_xwindow(self.video_frame.winId())
-        elif sys.platform == "win32":
-            self.player.set_hwnd(self.video_frame.winId())
-        elif sys.platform == "darwin":
-            self.player.set_nsobject(int(self.video_frame.winId()))
+        # 스트림 상태 표시
+        self.status_label = QLabel("⏹ 대기 중")
+        self.status_label.setAlignment(Qt.AlignCenter)
+        self.signals.stream_state.connect(self.update_stream_state)
+
+        # 탐지 상태 (실효 fps, 스킵/버린 프레임, 지연)
+        self.stats_label = QLabel("")
+        self.stats_label.setAlignment(Qt.AlignCenter)
+        self.stats_label.setStyleSheet("color: gray; font-size: 11px;")
+        self.stats_timer = QTimer(self)
+        self.stats_timer.setInterval(STATS_INTERVAL_MS)
+        self.stats_timer.timeout.connect(self.update_stream_stats)
+        self.stats_timer.start()
+
+        if not self.shared_decode:
+            if sys.platform.startswith("linux"):
+                self.player.set_xwindow(self.video_frame.winId())
+            elif sys.platform == "win32":
+                self.player.set_hwnd(self.video_frame.winId())
+            elif sys.platform == "darwin":
+                self.player.set_nsobject(int(self.video_frame.winId()))
 
 
     def prompt_for_video_url(self):
         video_url, ok = QInputDialog.getText(self, "URL 입력", "영상 URL을 입력하세요:")
         if ok and video_url:
-            self.play_stream(video_url, "사용자입력")
+            self.play_stream(video_url, "사용자입력", resolvable=False)
 
     def get_cctv_list(self):
-        api_url = f"https://openapi.its.go.kr:9443/cctvInfo?apiKey={api_key}&type=ex&cctvType=1&minX=126.8&maxX=126.9&minY=36.7&maxY=37.0&getType=json"
-        response = requests.get(api_url)
-        data = response.json()
-        return data['response']['data']
+        return fetch_cctv_list()
 
-    def play_stream(self, url, cctvname):
+    def play_stream(self, url, cctvname, resolvable=True):
         print(f"\n🎥 재생할 CCTV URL: {url}")
-        self.player.stop()
-        media = self.instance.media_new(url)
-        self.player.set_media(media)
-        self.player.play()
+        self.current_name = cctvname
+        resolve_url = (lambda: resolve_cctv_url(cctvname)) if resolvable else None
+        if self.supervisor:
+            self.supervisor.play(url, resolve_url)
+        else:
+            self.player.stop()
+            media = self.instance.media_new(url)
+            self.player.set_media(media)
+            self.player.play()
 
         # ✅ 이전 스레드가 존재하면 안전하게 종료
         if self.worker:
@@ -134,140 +348,50 @@ class CCTVViewer(QWidget):
             self.worker.join()  # <- 완전히 종료될 때까지 기다림
 
         # ✅ 새로운 탐지 스레드 시작
-        self.worker = DetectionWorker(url, cctvname, signal_handler=self.signals)
+        frame_source = self.frame_source.shared if self.frame_source else None
+        if self.engine:
+            self.worker = ProcessDetectionWorker(self.engine, url, cctvname, signal_handler=self.signals,
+                                                 resolve_url=resolve_url, frame_source=frame_source)
+        else:
+            self.worker = DetectionWorker(url, cctvname, signal_handler=self.signals,
+                                          resolve_url=resolve_url, frame_source=frame_source,
+                                          scheduler=get_batch_scheduler())
         self.worker.start()
 
 
+    def emit_player_state(self, state):
+        # VlcStreamSupervisor 상태 변화 → 워커들과 같은 stream_state 시그널로
+        if self.current_name:
+            self.signals.stream_state.emit(self.current_name, state)
+
+    def update_stream_state(self, cctvname, state):
+        text = {
+            "live": "🟢 수신 중",
+            "reconnecting": "🟡 재연결 중...",
+            "dead": "🔴 연결 끊김",
+        }.get(state, state)
+        self.status_label.setText(f"[{cctvname}] {text}")
+
+    def update_stream_stats(self):
+        if self.worker and self.worker.is_alive():
+            self.stats_label.setText(format_stream_stats(self.worker.stats()))
+        else:
+            self.stats_label.setText("")
+
     def stop_stream(self):
-        self.player.stop()
+        if self.supervisor:
+            self.supervisor.stop()
+        else:
+            self.player.stop()
         if self.worker:
             self.worker.stop()
             self.worker.join()
             self.worker = None
+        self.current_name = None
+        self.status_label.setText("⏹ 대기 중")
         print("🛑 영상 중지됨")
 
 
-class ImageListItem(QWidget):
-    def __init__(self, timestamp, path, cctvname, parent):
-        super().__init__()
-        self.parent_widget = parent
-        self.image_path = path
-        self.is_expanded = False
-        self.analysis_result = None
-        self.analysis_running = False
-
-        self.setFixedWidth(400)
-
-        self.main_layout = QVBoxLayout(self)
-        self.setLayout(self.main_layout)
-        self.main_layout.setSpacing(5)
-        self.main_layout.setContentsMargins(5, 5, 5, 5)
-
-        # 썸네일 + 제목
-        top_row = QHBoxLayout()
-        self.thumbnail = QLabel()
-        self.thumbnail.setFixedSize(60, 40)
-        self.thumbnail.setScaledContents(True)
-        if os.path.exists(self.image_path):
-            pixmap = QPixmap(self.image_path).scaled(60, 40, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            self.thumbnail.setPixmap(pixmap)
-
-        self.header = QLabel(f"[{cctvname}] {timestamp}")
-        self.header.setWordWrap(True)
-        self.header.setFixedWidth(320)
-        self.header.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
-        self.header.setStyleSheet("padding: 5px; background: transparent;")
-        self.header.mousePressEvent = lambda event: self.toggle_expand()
-
-        top_row.addWidget(self.thumbnail)
-        top_row.addWidget(self.header)
-        self.main_layout.addLayout(top_row)
-
-        # 요약
-        self.preview_label = QLabel("⏳ 분석 대기 중...")
-        self.preview_label.setStyleSheet("color: gray; font-size: 12px; margin-left: 64px;")
-        self.main_layout.addWidget(self.preview_label)
-
-        # 확장 프레임
-        self.expand_frame = QFrame()
-        self.expand_frame.setStyleSheet("background-color: #f9f9f9; border: 1px solid #ccc;")
-        self.expand_frame.setVisible(False)
-        expand_layout = QVBoxLayout()
-        self.expand_frame.setLayout(expand_layout)
-
-        self.image_label = QLabel()
-        self.image_label.setAlignment(Qt.AlignCenter)
-        self.image_label.setFixedHeight(350)
-
-        self.chat_display = QTextEdit()
-        self.chat_display.setReadOnly(True)
-
-        self.close_button = QPushButton("닫기")
-        self.close_button.clicked.connect(self.collapse)
-
-        expand_layout.addWidget(self.image_label)
-        expand_layout.addWidget(self.chat_display)
-        expand_layout.addWidget(self.close_button)
-
-        self.main_layout.addWidget(self.expand_frame)
-
-    def start_analysis(self):
-        if self.analysis_running or self.analysis_result:
-            return
-        
-        conn, cursor = init_db()
-
-        try:
-            cursor.execute("SELECT analysis_result FROM illegal_vehicles WHERE image_path = ?", (self.image_path,))
-            row = cursor.fetchone()
-            if row and row[0]:
-                self.analysis_result = row[0]
-                self.preview_label.setText(row[0].strip().splitlines()[0])
-                return  # 🔹 이미 분석된 결과가 있으므로 여기서 종료
-        finally:
-            conn.close()
-
-        self.analysis_running = True
-        self.preview_label.setText("🧠 분석 중...")
-
-        result = analyze_image(self.image_path)
-        print(result)
-        self.analysis_result = result
-        self.analysis_running = False
-        first_line = result.strip().splitlines()[0] if result else "(결과 없음)"
-        self.preview_label.setText(first_line)
-
-        conn, cursor = init_db()
-        try:
-            cursor.execute("UPDATE illegal_vehicles SET analysis_result = ? WHERE image_path = ?", (result, self.image_path))
-            conn.commit()
-        finally:
-            conn.close()
-
-
-    def toggle_expand(self):
-        self.parent_widget.collapse_all_except(self)
-
-        if not self.is_expanded:
-            if os.path.exists(self.image_path):
-                pixmap = QPixmap(self.image_path).scaled(400, 250, Qt.KeepAspectRatio)
-                self.image_label.setPixmap(pixmap)
-            if self.analysis_result:
-                self.chat_display.setText(f"분석 결과:\n{self.analysis_result}")
-            else:
-                self.chat_display.setText("아직 분석되지 않았습니다.")
-            self.expand_frame.setVisible(True)
-            self.is_expanded = True
-        else:
-            self.collapse()
-
-    def collapse(self):
-        self.expand_frame.setVisible(False)
-        self.is_expanded = False
-
-
-
-
 class ImageBrowserWidget(QWidget):
     def __init__(self):
         super().__init__()
@@ -275,91 +399,127 @@ class ImageBrowserWidget(QWidget):
         layout = QVBoxLayout(self)
         self.setLayout(layout)
 
-        scroll = QScrollArea()
-        scroll.setWidgetResizable(True)
-        layout.addWidget(scroll)
-
-        content = QWidget()
-        self.vbox = QVBoxLayout(content)
-        content.setLayout(self.vbox)
-        scroll.setWidget(content)
-
-        self.items = []
-        self.image_paths = set()
-        self.analysis_queue = []
-        self.analysis_index = 0
-        self.processing = False
+        # 🔹 분석 현황 (실행 중 / 대기)
+        self.analysis_label = QLabel("🧠 분석 대기 없음")
+        self.analysis_label.setStyleSheet("color: gray; font-size: 12px;")
+        layout.addWidget(self.analysis_label)
+
+        # 🔹 행은 모델이 스크롤에 따라 페이지 단위로 읽고, 보이는 행만 그림
+        self.model = DetectionListModel(self)
+        self.view = DetectionListView(self.model)
+        layout.addWidget(self.view)
+
+        # 🔹 VLM 분석은 작업 스레드에서 (GUI는 결과 시그널만 받음)
+        # 우선순위: 펼친 행 > 새 탐지 > 화면에 보이는 행 > 이전 기록 (같은 순위면 최신 먼저)
+        self.analysis = AnalysisExecutor(parent=self)
+        self.analysis.started.connect(self.model.set_running)
+        self.analysis.finished.connect(self.on_analysis_finished)
+        self.analysis.failed.connect(self.model.set_failed)
+        self.analysis.skipped.connect(self.model.set_waiting)
+        self.analysis.progress.connect(self.model.set_partial)     # 스트리밍: 첫 토큰부터 요약/상세에 표시
+        self.analysis.depth_changed.connect(self.update_analysis_depth)
+        self.visible_rows = set()           # 보이는 행이라 VISIBLE로 올린 rowid
+
+        self.view.expanded.connect(self.on_row_expanded)
+        self.view.collapsed.connect(self.on_row_collapsed)
+
+        # 스크롤이 멈추면 보이는 행 기준으로 우선순위 갱신
+        self.scroll_timer = QTimer(self)
+        self.scroll_timer.setSingleShot(True)
+        self.scroll_timer.setInterval(150)
+        self.scroll_timer.timeout.connect(self.update_visible_analysis)
+        self.view.verticalScrollBar().valueChanged.connect(lambda _: self.scroll_timer.start())
+        self.model.rowsInserted.connect(lambda *_: self.scroll_timer.start())
+
+        # 🔹 새 탐지: 시그널 payload를 모았다가 DETECTION_FLUSH_MS마다 한 번에 추가
+        self.last_seen_rowid = 0
+        self.pending_detections = {}     # rowid -> (timestamp, path, cctvname)
+        self.flush_scheduled = False
+
+        # 실패 후 재시도 시각이 된 작업, 리스가 만료된 작업을 주기적으로 다시 넣음
+        self.resume_timer = QTimer(self)
+        self.resume_timer.setInterval(ANALYSIS_RESUME_MS)
+        self.resume_timer.timeout.connect(self.resume_analysis_jobs)
+        self.resume_timer.start()
 
         self.populate_image_items()
 
     def populate_image_items(self):
-        conn, cursor = init_db()
-        try:
-            cursor.execute("SELECT timestamp, image_path, cctvname FROM illegal_vehicles ORDER BY timestamp DESC")
-            for timestamp, path, cctvname in cursor.fetchall():
-                if not os.path.exists(path):
-                    continue
-                item = ImageListItem(timestamp, path, cctvname, self)
-                #item.setFixedHeight(100)
-                self.vbox.addWidget(item)
-                self.items.append(item)
-                self.analysis_queue.append(item)
-            self.vbox.addStretch()
-            self.run_next_analysis()
-        finally:
-            conn.close()
-
-    def add_new_image_item(self, timestamp, path, cctvname, to_top=True):
-        """새 이미지 감지(또는 DB에 추가)시 리스트에 동적으로 추가"""
-        if path in self.image_paths:    # 중복 방지
+        """끝나지 않은 분석 작업으로 대기열만 채움 (목록 표시는 모델이 필요할 때 읽음)"""
+        with get_db().reader() as cursor:
+            cursor.execute("SELECT MAX(id) FROM illegal_vehicles")
+            self.last_seen_rowid = cursor.fetchone()[0] or 0
+        self.resume_analysis_jobs()
+
+    def resume_analysis_jobs(self):
+        for rowid, path in due_jobs():
+            self.analysis.submit(rowid, path, PRIORITY_BACKLOG)     # 이미 대기 중이면 순위 유지
+
+    def handle_new_detection(self, rowid, path, cctvname, timestamp):
+        """새 탐지 발생(시그널)시 payload를 모아두고, 잠시 뒤 한 번에 반영"""
+        if rowid <= self.last_seen_rowid:
             return
-        item = ImageListItem(timestamp, path, cctvname, self)
-        if to_top:
-            self.vbox.insertWidget(0, item)      # 최신 이미지는 맨 위에 추가
-            self.items.insert(0, item)
-        else:
-            self.vbox.addWidget(item)
-            self.items.append(item)
-        self.image_paths.add(path)               # 중복 방지용 집합에 경로 등록
-        self.analysis_queue.append(item)
-        self.run_next_analysis()                 # 필요시 바로 분석
-
-
-    def handle_new_detection(self):
-        """새 탐지 발생(시그널)시 DB에서 가장 최근 이미지 하나만 추가"""
-        conn, cursor = init_db()
-        try:
-            cursor.execute("SELECT timestamp, image_path, cctvname FROM illegal_vehicles ORDER BY timestamp DESC LIMIT 1")
-            row = cursor.fetchone()
-            if row:
-                timestamp, path, cctvname = row
-                if os.path.exists(path):
-                    self.add_new_image_item(timestamp, path, cctvname)
-        finally:
-            conn.close()
-
-
-    def run_next_analysis(self):
-        if self.processing or self.analysis_index >= len(self.analysis_queue):
+        self.pending_detections[rowid] = (timestamp, path, cctvname)
+        if not self.flush_scheduled:
+            self.flush_scheduled = True
+            QTimer.singleShot(DETECTION_FLUSH_MS, self.flush_new_detections)
+
+    def flush_new_detections(self):
+        """last_seen_rowid 이후 행을 한 번에 추가 (시그널을 놓친 행은 DB에서 한 번에 보충)"""
+        self.flush_scheduled = False
+        pending, self.pending_detections = self.pending_detections, {}
+        if not pending:
             return
 
-        self.processing = True
-        item = self.analysis_queue[self.analysis_index]
-
-        def process():
-            item.start_analysis()
-            self.analysis_index += 1
-            self.processing = False
-            QTimer.singleShot(100, self.run_next_analysis)
-
-        QTimer.singleShot(10, process)
-
-    def collapse_all_except(self, current_item):
-        for item in self.items:
-            if item != current_item and item.is_expanded:
-                item.expand_frame.setVisible(False)
-                item.is_expanded = False
-
+        newest = max(pending)
+        if len(pending) < newest - self.last_seen_rowid:
+            with get_db().reader() as cursor:
+                cursor.execute("SELECT id, timestamp, image_path, cctvname FROM illegal_vehicles WHERE id > ? ORDER BY id",
+                               (self.last_seen_rowid,))
+                for rowid, timestamp, path, cctvname in cursor.fetchall():
+                    pending.setdefault(rowid, (timestamp, path, cctvname))
+
+        rows = [(rowid, *pending[rowid]) for rowid in sorted(pending) if os.path.exists(pending[rowid][1])]
+        self.model.prepend_rows(rows)       # 한 번의 rowsInserted로 반영
+        for rowid, _, path, _ in rows:
+            self.analysis.submit(rowid, path, PRIORITY_LIVE)   # 새 탐지는 이전 기록보다 먼저
+        self.last_seen_rowid = max(self.last_seen_rowid, newest)
+
+    def update_visible_analysis(self):
+        """보이는 미분석 행은 VISIBLE로 올리고, 스크롤로 사라진 행은 이전 기록 순위로 되돌림
+
+        실패로 끝난 작업, 재시도 시각 전인 작업은 넣지 않음 (재시도는 resume_analysis_jobs가 맡음)
+        """
+        visible = {}
+        for index in self.view.visible_rows():
+            if index.data(AnalysisDueRole):
+                visible[index.data(RowIdRole)] = index.data(PathRole)
+        for rowid in self.visible_rows - visible.keys():
+            if self.analysis.priority_of(rowid) == PRIORITY_VISIBLE:
+                self.analysis.set_priority(rowid, PRIORITY_BACKLOG)
+        for rowid, path in visible.items():
+            self.analysis.submit(rowid, path, PRIORITY_VISIBLE)     # 더 높은 순위(새 탐지/펼침)는 그대로
+        self.visible_rows = set(visible)
+
+    def on_row_expanded(self, rowid):
+        index = self.model.index_of(rowid)
+        if index.data(AnalysisDueRole):
+            self.analysis.submit(rowid, index.data(PathRole), PRIORITY_EXPANDED)
+
+    def on_row_collapsed(self, rowid):
+        if self.analysis.priority_of(rowid) == PRIORITY_EXPANDED:
+            priority = PRIORITY_VISIBLE if rowid in self.visible_rows else PRIORITY_BACKLOG
+            self.analysis.set_priority(rowid, priority)
+
+    def on_analysis_finished(self, rowid, result):
+        self.visible_rows.discard(rowid)
+        self.model.set_result(rowid, result)
+
+    def update_analysis_depth(self, queued, running):
+        if not queued and not running:
+            self.analysis_label.setText("🧠 분석 대기 없음")
+        else:
+            self.analysis_label.setText(f"🧠 분석 중 {running} · 대기 {queued}")
 
 
 class MainWindow(QWidget):
@@ -373,8 +533,17 @@ class MainWindow(QWidget):
 
         self.signals = WorkerSignals()
 
+        # 🔹 탐지 모델 미리 로드 + 워밍업 (process 모드는 탐지 프로세스 안에서)
+        self.engine = None
+        if DETECTION_ENGINE == 'process':
+            self.engine = DetectionEngine(on_error=self.signals.engine_error.emit)
+            self.engine.start()
+        else:
+            get_model_pool().preload_async(MODEL_PATH)
+
         # 1️⃣ 왼쪽: CCTV 버튼 리스트
-        self.cctv_viewer = CCTVViewer(signals=self.signals)
+        self.cctv_viewer = CCTVViewer(signals=self.signals, engine=self.engine)
+        self.signals.engine_error.connect(self.show_engine_error)
         main_layout.addLayout(self.cctv_viewer.button_layout, 2)
 
         # 2️⃣ 중앙: VLC 영상 영역
@@ -382,6 +551,8 @@ class MainWindow(QWidget):
         video_layout.addWidget(self.cctv_viewer.video_frame, 8)
         video_layout.addWidget(self.cctv_viewer.play_button, 1)
         video_layout.addWidget(self.cctv_viewer.stop_button, 1)
+        video_layout.addWidget(self.cctv_viewer.status_label)
+        video_layout.addWidget(self.cctv_viewer.stats_label)
         main_layout.addLayout(video_layout, 5)
 
         # 3️⃣ 오른쪽: 이미지 리스트 (탐지 결과)
@@ -389,10 +560,38 @@ class MainWindow(QWidget):
         self.signals.detection_made.connect(self.image_browser.handle_new_detection)
         main_layout.addWidget(self.image_browser, 5)
 
+        self.stats_log_timer = QTimer(self)
+        self.stats_log_timer.setInterval(STATS_LOG_MS)
+        self.stats_log_timer.timeout.connect(self.log_stats)
+        self.stats_log_timer.start()
+
+    def show_engine_error(self, message):
+        QMessageBox.warning(self, "탐지 오류", f"{message}\n탐지가 중지됐을 수 있습니다. 프로그램을 다시 시작해 주세요.")
+
+    def log_stats(self):
+        """스트림/썸네일/분석 통계를 콘솔에 한 번씩 남김"""
+        worker = self.cctv_viewer.worker
+        if worker and worker.is_alive():
+            print(f"📊 탐지: {worker.stats()}")
+        print(f"📊 목록: {self.image_browser.model.thumbnails.stats()}")
+        stats = {**self.image_browser.analysis.stats(), **analysis_stats()}
+        print(f"📊 분석: {stats}")
+
     def closeEvent(self, event):
+        self.stats_log_timer.stop()
+        self.cctv_viewer.stats_timer.stop()
         if self.cctv_viewer.worker:
             self.cctv_viewer.worker.stop()
             self.cctv_viewer.worker.join()
+        if self.engine:
+            self.engine.stop()
+        stop_batch_scheduler()
+        stop_evidence_writer()
+        self.image_browser.resume_timer.stop()
+        self.image_browser.analysis.shutdown()
+        self.image_browser.model.thumbnails.shutdown()
+        close_db()
+        get_model_pool().unload_all()
         event.accept()
 
 
@@ -0,0 +1,181 @@
+# batch_inference.py
+# 여러 CCTV 스트림의 프레임을 모아 한 번에 추론하는 중앙 스케줄러
+# - 각 DetectionWorker는 submit(stream, frame)으로 최신 프레임을 맡기고 Future로 결과를 받음
+# - 스트림당 대기 프레임은 1장 (새 프레임이 오면 이전 것은 취소)
+# - max_batch장이 모이거나, 등록된 스트림이 모두 제출했거나, max_wait가 지나면 한 번에 forward
+# - 결과 (detections, illegal_boxes)는 각 스트림으로 돌려주고 update_tracks는 각 워커가 수행
+# - 모델 로드 실패 등으로 스레드가 끝나면 대기 중인 Future는 모두 예외로 끝내고, 이후 submit()은 바로 거절
+import threading
+import time
+import traceback
+from concurrent.futures import Future
+from Detection.detector import detect_vehicles
+from model_pool import get_model_pool, MODEL_PATH
+
+MAX_BATCH = 8
+MAX_WAIT = 0.03         # 첫 프레임이 들어온 뒤 배치를 모으는 최대 대기(초)
+
+
+class _PrecomputedModel:
+    """배치 결과 하나를 들고 있는 모델 대역
+
+    detect_vehicles(model, frame)가 내부에서 model(frame) / model.predict(frame)을
+    호출하면 이미 계산된 결과를 돌려줌. 그 외 속성(names 등)은 원래 모델로 위임
+    """
+
+    def __init__(self, model, result):
+        self._model = model
+        self._result = result
+
+    def __call__(self, *args, **kwargs):
+        return [self._result]
+
+    def predict(self, *args, **kwargs):
+        return [self._result]
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+
+def detect_vehicles_batch(model, frames, conf_threshold=0.5):
+    """프레임 여러 장을 forward 한 번으로 추론하고 프레임별 detect_vehicles 결과 반환"""
+    results = model.predict(frames, conf=conf_threshold, verbose=False)
+    return [
+        detect_vehicles(_PrecomputedModel(model, result), frame, conf_threshold=conf_threshold)
+        for frame, result in zip(frames, results)
+    ]
+
+
+class BatchInferenceScheduler(threading.Thread):
+    def __init__(self, model_path=MODEL_PATH, max_batch=MAX_BATCH, max_wait=MAX_WAIT, conf_threshold=0.5):
+        super().__init__(daemon=True)
+        self.model_path = model_path
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.conf_threshold = conf_threshold
+
+        self._cond = threading.Condition()
+        self._pending = {}      # stream -> (frame, future, 제출 시각)
+        self._streams = set()
+        self.running = True
+        self.error = None       # 스레드를 끝낸 예외 (모델 로드 실패 등)
+
+        self.batches = 0
+        self.frames = 0
+        self.replaced = 0
+
+    def register(self, stream):
+        with self._cond:
+            self._streams.add(stream)
+
+    def unregister(self, stream):
+        with self._cond:
+            self._streams.discard(stream)
+            entry = self._pending.pop(stream, None)
+            self._cond.notify_all()
+        if entry:
+            entry[1].cancel()
+
+    def submit(self, stream, frame):
+        """Future 반환 (스케줄러가 이미 멈췄으면 RuntimeError)"""
+        future = Future()
+        with self._cond:
+            if not self.running:
+                raise RuntimeError(f"배치 추론 스케줄러가 멈춤: {self.error!r}")
+            old = self._pending.get(stream)
+            self._pending[stream] = (frame, future, time.monotonic())
+            self._cond.notify_all()
+        if old:
+            self.replaced += 1
+            old[1].cancel()
+        return future
+
+    def _ready(self):
+        if not self._pending:
+            return False
+        if len(self._pending) >= self.max_batch or len(self._pending) >= len(self._streams):
+            return True
+        oldest = min(submitted for _, _, submitted in self._pending.values())
+        return time.monotonic() - oldest >= self.max_wait
+
+    def _take_batch(self):
+        with self._cond:
+            while self.running and not self._ready():
+                self._cond.wait(self.max_wait if self._pending else 0.5)
+            if not self.running:
+                return []
+            # 오래 기다린 스트림부터 max_batch개
+            streams = sorted(self._pending, key=lambda s: self._pending[s][2])[:self.max_batch]
+            return [self._pending.pop(s) for s in streams]
+
+    def run(self):
+        handle = None
+        try:
+            handle = get_model_pool().acquire(self.model_path)
+            while self.running:
+                batch = [entry for entry in self._take_batch() if entry[1].set_running_or_notify_cancel()]
+                if not batch:
+                    continue
+                frames = [frame for frame, _, _ in batch]
+                try:
+                    outputs = detect_vehicles_batch(handle.model, frames, self.conf_threshold)
+                except Exception as e:
+                    for _, future, _ in batch:
+                        future.set_exception(e)
+                    continue
+                for (_, future, _), output in zip(batch, outputs):
+                    future.set_result(output)
+                self.batches += 1
+                self.frames += len(batch)
+        except Exception as e:
+            self.error = e
+            traceback.print_exc()
+        finally:
+            if handle is not None:
+                handle.release()
+            with self._cond:
+                self.running = False
+                leftovers = list(self._pending.values())
+                self._pending.clear()
+            # 기다리는 워커가 영원히 막히지 않도록 모두 예외로 끝냄
+            error = self.error or RuntimeError("배치 추론 스케줄러가 중지됨")
+            for _, future, _ in leftovers:
+                if not future.done():
+                    future.set_exception(error)
+
+    def stop(self):
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "frames": self.frames,
+            "avg_batch": round(self.frames / self.batches, 2) if self.batches else 0.0,
+            "replaced": self.replaced,
+            "streams": len(self._streams),
+        }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_batch_scheduler():
+    """프로세스 전역 배치 스케줄러 (처음 호출 시 시작)"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None or not _scheduler.is_alive():
+            _scheduler = BatchInferenceScheduler()
+            _scheduler.start()
+        return _scheduler
+
+
+def stop_batch_scheduler():
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is not None:
+            _scheduler.stop()
+            _scheduler.join(timeout=2.0)
+            _scheduler = None
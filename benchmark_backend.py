@@ -0,0 +1,78 @@
+# benchmark_backend.py
+# CPU 추론 백엔드 비교: torch CPU (기본 경로) vs ONNX Runtime
+# 사용법: python benchmark_backend.py [프레임 수] [백엔드...]
+#   예) python benchmark_backend.py 200 torch-cpu onnx
+import sys
+import glob
+import time
+import cv2
+import numpy as np
+from Detection.detector import detect_vehicles
+from inference_backend import get_backend, default_cpu_threads
+from model_pool import MODEL_PATH
+
+SAMPLE_GLOB = "Detection/sample/*.mp4"
+WARMUP_FRAMES = 5
+
+
+def read_frames(path, max_frames):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    try:
+        while len(frames) < max_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+    finally:
+        cap.release()
+    return frames
+
+
+def run_backend(name, clips):
+    model = get_backend(name).load(MODEL_PATH)
+    results = {}
+    for clip, frames in clips.items():
+        for frame in frames[:WARMUP_FRAMES]:
+            detect_vehicles(model, frame)
+
+        latencies = []
+        for frame in frames:
+            start = time.perf_counter()
+            detect_vehicles(model, frame)
+            latencies.append((time.perf_counter() - start) * 1000)
+        results[clip] = np.array(latencies)
+    return results
+
+
+def main():
+    max_frames = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    backends = sys.argv[2:] or ["torch-cpu", "onnx"]
+
+    clips = {}
+    for path in sorted(glob.glob(SAMPLE_GLOB)):
+        frames = read_frames(path, max_frames)
+        if frames:
+            clips[path] = frames
+    if not clips:
+        print(f"❌ 샘플 영상이 없습니다: {SAMPLE_GLOB}")
+        return
+
+    print(f"🧵 intra-op 스레드: {default_cpu_threads()}")
+    summary = {}
+    for name in backends:
+        print(f"\n▶ {name}")
+        results = run_backend(name, clips)
+        for clip, ms in results.items():
+            print(f"  {clip}: {len(ms)}프레임  평균 {ms.mean():.1f}ms  p95 {np.percentile(ms, 95):.1f}ms  {1000 / ms.mean():.1f}fps")
+        summary[name] = np.concatenate(list(results.values())).mean()
+
+    base = summary.get("torch-cpu")
+    print("\n📊 요약")
+    for name, mean_ms in summary.items():
+        speedup = f"  (torch-cpu 대비 x{base / mean_ms:.2f})" if base else ""
+        print(f"  {name}: 평균 {mean_ms:.1f}ms{speedup}")
+
+
+if __name__ == "__main__":
+    main()
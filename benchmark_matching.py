@@ -0,0 +1,72 @@
+# benchmark_matching.py
+# 박스 ↔ 트랙 매칭 비용 비교: 박스마다 파이썬 루프 vs IoU 행렬 한 번 (box_matching)
+# 사용법: python benchmark_matching.py [반복 횟수]
+import sys
+import time
+import numpy as np
+from box_matching import match_boxes_to_tracks, linear_sum_assignment
+
+TRACK_COUNTS = (10, 50, 200)
+ILLEGAL_RATIO = 0.2     # 트랙 중 불법 적재 박스 비율
+
+
+class _BenchTrack:
+    def __init__(self, track_id, ltrb):
+        self.track_id = track_id
+        self._ltrb = ltrb
+
+    def to_ltrb(self):
+        return self._ltrb
+
+    def is_confirmed(self):
+        return True
+
+
+def python_loop_match(box, tracks, iou_threshold=0.3):
+    """기존 match_with_track 방식: 박스 하나에 대해 트랙을 전부 훑음"""
+    best_id, best_iou = None, iou_threshold
+    x1, y1, x2, y2 = box[:4]
+    for t in tracks:
+        tx1, ty1, tx2, ty2 = t.to_ltrb()
+        iw = max(0.0, min(x2, tx2) - max(x1, tx1))
+        ih = max(0.0, min(y2, ty2) - max(y1, ty1))
+        inter = iw * ih
+        union = (x2 - x1) * (y2 - y1) + (tx2 - tx1) * (ty2 - ty1) - inter
+        iou = inter / union if union > 0 else 0.0
+        if iou >= best_iou:
+            best_id, best_iou = t.track_id, iou
+    return best_id
+
+
+def make_scene(num_tracks, rng):
+    xy = rng.uniform(0, 1800, (num_tracks, 2))
+    wh = rng.uniform(60, 300, (num_tracks, 2))
+    ltrb = np.hstack([xy, xy + wh])
+    tracks = [_BenchTrack(str(i), ltrb[i].tolist()) for i in range(num_tracks)]
+    picked = rng.choice(num_tracks, max(1, int(num_tracks * ILLEGAL_RATIO)), replace=False)
+    boxes = [(ltrb[i] + rng.normal(0, 4, 4)).tolist() for i in picked]
+    return boxes, tracks
+
+
+def bench(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rng = np.random.default_rng(0)
+    print(f"헝가리안: {'scipy' if linear_sum_assignment else '없음 (greedy만)'}  반복: {repeat}")
+    print(f"{'트랙':>6} {'박스':>6} {'루프(us)':>10} {'greedy(us)':>11} {'hungarian(us)':>14}")
+    for n in TRACK_COUNTS:
+        boxes, tracks = make_scene(n, rng)
+        loop_us = bench(lambda: [python_loop_match(b, tracks) for b in boxes], repeat)
+        greedy_us = bench(lambda: match_boxes_to_tracks(boxes, tracks, method="greedy"), repeat)
+        hung_us = bench(lambda: match_boxes_to_tracks(boxes, tracks), repeat)
+        print(f"{n:>6} {len(boxes):>6} {loop_us:>10.1f} {greedy_us:>11.1f} {hung_us:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
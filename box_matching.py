@@ -0,0 +1,105 @@
+# box_matching.py
+# 불법 적재 박스 ↔ 트랙 매칭 (벡터화 버전)
+# Detection.utils.match_with_track(box, tracks)는 박스 하나마다 트랙 전체를 파이썬으로 훑음
+# 여기서는 박스 N개 × 트랙 M개 IoU 행렬을 numpy로 한 번에 계산하고
+# 헝가리안(scipy 있으면) 또는 greedy로 1:1 할당
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None
+
+IOU_THRESHOLD = 0.3
+
+
+def boxes_to_array(boxes):
+    """[[x1, y1, x2, y2, ...], ...] → (N, 4) float32"""
+    if len(boxes) == 0:
+        return np.zeros((0, 4), dtype=np.float32)
+    return np.asarray([b[:4] for b in boxes], dtype=np.float32).reshape(-1, 4)
+
+
+def tracks_to_arrays(tracks):
+    """트랙 목록 → ((M, 4) xyxy, (M,) track id)
+
+    deep_sort 계열 Track(to_ltrb / track_id / is_confirmed)과
+    (x1, y1, x2, y2, track_id) 형태의 시퀀스를 모두 받음
+    """
+    xyxy, ids = [], []
+    for t in tracks:
+        if hasattr(t, "to_ltrb"):
+            if hasattr(t, "is_confirmed") and not t.is_confirmed():
+                continue
+            xyxy.append(t.to_ltrb()[:4])
+            ids.append(t.track_id)
+        else:
+            xyxy.append(t[:4])
+            ids.append(t[4])
+    if not xyxy:
+        return np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.int64)
+    return np.asarray(xyxy, dtype=np.float32), np.asarray(ids)
+
+
+def iou_matrix(a, b):
+    """(N, 4) × (M, 4) → (N, M) IoU"""
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), dtype=np.float32)
+    ix1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    iy1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    ix2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    iy2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(ix2 - ix1, 0, None) * np.clip(iy2 - iy1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return inter / np.maximum(union, 1e-6)
+
+
+def _greedy_assign(iou, threshold):
+    # IoU 큰 쌍부터 하나씩 확정
+    rows, cols = np.nonzero(iou >= threshold)
+    order = np.argsort(-iou[rows, cols], kind="stable")
+    used_r, used_c, pairs = set(), set(), []
+    for k in order:
+        r, c = rows[k], cols[k]
+        if r in used_r or c in used_c:
+            continue
+        used_r.add(r)
+        used_c.add(c)
+        pairs.append((r, c))
+    return pairs
+
+
+def _hungarian_assign(iou, threshold):
+    rows, cols = linear_sum_assignment(-iou)
+    return [(r, c) for r, c in zip(rows, cols) if iou[r, c] >= threshold]
+
+
+def assign(box_xyxy, track_xyxy, iou_threshold=IOU_THRESHOLD, method="hungarian"):
+    """(N, 4) 박스 × (M, 4) 트랙 → 매칭된 (박스 인덱스, 트랙 인덱스) 쌍 목록"""
+    if len(box_xyxy) == 0 or len(track_xyxy) == 0:
+        return []
+    iou = iou_matrix(box_xyxy, track_xyxy)
+    if method == "hungarian" and linear_sum_assignment is not None:
+        return _hungarian_assign(iou, iou_threshold)
+    return _greedy_assign(iou, iou_threshold)
+
+
+def match_records(det, trk, iou_threshold=IOU_THRESHOLD, method="hungarian"):
+    """detection_records 레코드용: illegal 행의 track_id를 제자리에서 채움"""
+    illegal_idx = np.flatnonzero(det["illegal"])
+    det["track_id"][illegal_idx] = -1
+    for r, c in assign(det["xyxy"][illegal_idx], trk["xyxy"], iou_threshold, method):
+        det["track_id"][illegal_idx[r]] = trk["track_id"][c]
+    return det
+
+
+def match_boxes_to_tracks(boxes, tracks, iou_threshold=IOU_THRESHOLD, method="hungarian"):
+    """박스별 매칭된 track id 리스트 반환 (매칭 없으면 None)"""
+    box_arr = boxes_to_array(boxes)
+    track_xyxy, track_ids = tracks_to_arrays(tracks)
+    matched = [None] * len(box_arr)
+    for r, c in assign(box_arr, track_xyxy, iou_threshold, method):
+        matched[r] = track_ids[c].item() if hasattr(track_ids[c], "item") else track_ids[c]
+    return matched
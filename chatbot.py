@@ -1,21 +1,19 @@
 import os
-from openai import OpenAI
 from dotenv import load_dotenv
 import base64
+import time
+import hashlib
+from analysis_cache import get_analysis_cache
+from vlm_preprocess import prepare_image, signature, upload_metrics
+from vlm_client import get_vlm_client, vlm_stats
 
 load_dotenv()
 
 api_key = os.getenv("OPENAI_API_KEY")
-client = OpenAI(api_key=api_key)
 
+MODEL = "gpt-4.1-nano"
 
-# 로컬 이미지 열기
-def analyze_image(img_path):
-
-    with open(img_path, "rb") as image_file:
-        base64_image = base64.b64encode(image_file.read()).decode("utf-8")
-
-    prompt = """
+PROMPT = """
     다음 이미지를 분석해서 다음 기준에 따라 차량의 불법 적재 여부를 판단해줘:
 
     적재불량 이란?
@@ -40,20 +38,40 @@ def analyze_image(img_path):
     사진 각도나 품질 때문에 판단이 어려운 경우는 '판단이 어렵습니다'라고 명확히 말해주세요.
     """
 
-    response = client.responses.create(
-        model="gpt-4.1-nano",
-        input=[{
-            "role": "user",
-            "content": [
-                {"type": "input_text", "text": prompt},
-                {
-                    "type": "input_image",
-                    "image_url": f"data:image/jpeg;base64,{base64_image}",
-                },
-            ],
-        }],
-    )
-
-    text = response.output[0].content[0].text
-
-    return text
\ No newline at end of file
+# 프롬프트나 모델이 바뀌면 캐시된 결과를 다시 쓰지 않도록 캐시 키에 포함
+ANALYSIS_VERSION = hashlib.sha1(f"{MODEL}\n{PROMPT}".encode("utf-8")).hexdigest()[:12]
+
+
+# 로컬 이미지 열기
+# roi: 이미지 안의 차량 박스 (x1, y1, x2, y2) – 주면 박스 주변만 잘라서 보냄
+# on_delta: 주면 응답을 스트리밍으로 받아 텍스트 조각마다 on_delta(조각) 호출 (반환값은 전체 텍스트)
+def analyze_image(img_path, roi=None, on_delta=None):
+
+    with open(img_path, "rb") as image_file:
+        image_bytes = image_file.read()
+
+    # 같은 이미지(바이트 기준)를 이미 분석했으면 API 호출 없이 반환
+    cache = get_analysis_cache()
+    cache_key = cache.key(image_bytes, f"{ANALYSIS_VERSION}:{signature(roi)}")
+    cached = cache.get(cache_key)
+    if cached is not None:
+        if on_delta:
+            on_delta(cached)
+        return cached
+
+    # 업로드 전 ROI 자르기 + 축소 + 재인코딩
+    upload_bytes, upload_info = prepare_image(image_bytes, roi)
+    base64_image = base64.b64encode(upload_bytes).decode("utf-8")
+
+    # 요청 한도/동시 요청 수/타임아웃/재시도는 vlm_client가 관리 (여러 작업 스레드가 같이 호출)
+    started = time.perf_counter()
+    text = get_vlm_client(api_key).analyze(PROMPT, base64_image, MODEL, on_delta)
+    print(upload_metrics.record(upload_info, (time.perf_counter() - started) * 1000))
+    cache.put(cache_key, text)
+
+    return text
+
+
+# 캐시 적중률, 업로드 절약량, API 재시도/대기 등 분석 쪽 누적 통계 (주기 로그용)
+def analysis_stats():
+    return {**get_analysis_cache().stats(), **upload_metrics.stats(), **vlm_stats()}
@@ -0,0 +1,249 @@
+# db_manager.py
+# illegal_vehicle.db 연결 관리
+# - WAL 모드 + synchronous=NORMAL → GUI 읽기와 탐지 쓰기가 서로 막지 않음
+# - 쓰기 연결은 프로세스당 하나를 계속 재사용 (writer()로 빌려 쓰고 자동 커밋)
+# - 읽기 전용 연결 몇 개를 풀로 두고 reader()로 빌려 씀
+# - 연결을 오래 쓰므로 sqlite3의 statement 캐시(cached_statements)가 그대로 재사용됨
+# - 스키마 버전은 PRAGMA user_version으로 관리, 열 때마다 밀린 마이그레이션을 순서대로 적용
+# - 연결마다 foreign_keys=ON → 행을 지우면 analysis_jobs 작업도 ON DELETE CASCADE로 같이 지워짐
+import sqlite3
+import threading
+import queue
+from pathlib import Path
+from contextlib import contextmanager
+from Detection.db import init_db
+
+DB_PATH = "Detection/illegal_vehicle.db"
+READ_POOL_SIZE = 3
+CACHED_STATEMENTS = 128
+BUSY_TIMEOUT_MS = 5000
+
+
+def _column_def(name, col_type, notnull, default):
+    """PRAGMA table_info 한 행 → 열 정의 (NOT NULL / DEFAULT 그대로)"""
+    parts = [name, col_type]
+    if notnull:
+        parts.append("NOT NULL")
+    if default is not None:
+        parts.append(f"DEFAULT {default}")     # dflt_value는 원래 적힌 SQL 식 그대로
+    return " ".join(p for p in parts if p)
+
+
+def _add_primary_key(conn):
+    """v1: 정수 기본 키(id) 추가 → 테이블을 새로 만들어 옮김 (기존 rowid, 열 제약/기본값 그대로 유지)
+
+    AUTOINCREMENT: 맨 끝 행을 지워도 그 id를 다시 쓰지 않음 (analysis_jobs가 id로 행을 가리킴)
+    """
+    columns = [(name, _column_def(name, col_type, notnull, default))
+               for _, name, col_type, notnull, default, pk in conn.execute("PRAGMA table_info(illegal_vehicles)")
+               if not pk]
+    names = ", ".join(name for name, _ in columns)
+    defs = ", ".join(column for _, column in columns)
+    return [
+        f"CREATE TABLE illegal_vehicles_new (id INTEGER PRIMARY KEY AUTOINCREMENT, {defs})",
+        f"INSERT INTO illegal_vehicles_new (id, {names}) SELECT rowid, {names} FROM illegal_vehicles",
+        "DROP TABLE illegal_vehicles",
+        "ALTER TABLE illegal_vehicles_new RENAME TO illegal_vehicles",
+    ]
+
+
+def _add_indexes(conn):
+    """v2: 조회 인덱스 (기존 행은 지우거나 바꾸지 않음 – 유일 제약은 v6)"""
+    return [
+        "CREATE INDEX IF NOT EXISTS idx_illegal_image_path ON illegal_vehicles (image_path)",
+        "CREATE INDEX IF NOT EXISTS idx_illegal_timestamp ON illegal_vehicles (timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_illegal_track_id ON illegal_vehicles (track_id)",
+    ]
+
+
+def _add_analysis_jobs(conn):
+    """v3: VLM 분석 작업 큐 (analysis_jobs.py)
+
+    기존 행은 분석 결과 유무로 done/pending 작업을 만들고, 이후 INSERT는 트리거가 작업을 만듦
+    (illegal_vehicles를 다시 만드는 마이그레이션을 추가하면 트리거도 다시 만들어야 함)
+    """
+    return [
+        """CREATE TABLE IF NOT EXISTS analysis_jobs (
+               id INTEGER PRIMARY KEY,
+               vehicle_id INTEGER NOT NULL UNIQUE REFERENCES illegal_vehicles (id) ON DELETE CASCADE,
+               state TEXT NOT NULL DEFAULT 'pending',
+               attempts INTEGER NOT NULL DEFAULT 0,
+               next_attempt_at REAL NOT NULL DEFAULT 0,
+               lease_until REAL,
+               owner TEXT,
+               last_error TEXT,
+               updated_at REAL)""",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_state ON analysis_jobs (state, next_attempt_at)",
+        """INSERT OR IGNORE INTO analysis_jobs (vehicle_id, state)
+               SELECT id, CASE WHEN analysis_result IS NULL THEN 'pending' ELSE 'done' END FROM illegal_vehicles""",
+        """CREATE TRIGGER IF NOT EXISTS trg_illegal_vehicles_job AFTER INSERT ON illegal_vehicles
+               BEGIN INSERT OR IGNORE INTO analysis_jobs (vehicle_id) VALUES (NEW.id); END""",
+    ]
+
+
+def _add_analysis_cache(conn):
+    """v4: analyze_image 결과 캐시 (analysis_cache.py)"""
+    return [
+        """CREATE TABLE IF NOT EXISTS analysis_cache (
+               key TEXT PRIMARY KEY,
+               result TEXT NOT NULL,
+               created_at REAL NOT NULL,
+               last_used_at REAL NOT NULL,
+               hits INTEGER NOT NULL DEFAULT 0)""",
+        "CREATE INDEX IF NOT EXISTS idx_cache_last_used ON analysis_cache (last_used_at)",
+    ]
+
+
+def _add_bbox(conn):
+    """v5: 증거 이미지 안에서의 차량 박스 'x1,y1,x2,y2' (VLM 업로드 전 ROI 자르기용)"""
+    columns = [name for _, name, *_ in conn.execute("PRAGMA table_info(illegal_vehicles)")]
+    return [] if "bbox" in columns else ["ALTER TABLE illegal_vehicles ADD COLUMN bbox TEXT"]
+
+
+def _add_session(conn):
+    """v6: 트래커 세션 열 + (cctvname, session, track_id) 유일 제약
+
+    track id는 트래커를 새로 만들 때마다(스트림을 열 때마다) 1부터 다시 시작하므로
+    카메라 + track id만으로는 같은 차량인지 알 수 없음 → 세션까지 같아야 중복
+    기존 행은 session이 NULL이라 서로 겹치지 않음 (행을 지우지 않음)
+    이전 v2가 만든 (cctvname, track_id) 유일 인덱스는 제거
+    """
+    columns = [name for _, name, *_ in conn.execute("PRAGMA table_info(illegal_vehicles)")]
+    return [
+        "DROP INDEX IF EXISTS idx_illegal_camera_track",
+        *([] if "session" in columns else ["ALTER TABLE illegal_vehicles ADD COLUMN session TEXT"]),
+        """CREATE UNIQUE INDEX IF NOT EXISTS idx_illegal_camera_session_track
+               ON illegal_vehicles (cctvname, session, track_id)""",
+    ]
+
+
+def _drop_orphan_jobs(conn):
+    """v7: 지워진 행을 가리키는 작업 정리
+
+    foreign_keys를 켜기 전에는 CASCADE가 동작하지 않아 행을 지워도 작업이 남았음
+    (그 id를 새 행이 다시 받으면 트리거의 INSERT OR IGNORE가 남은 작업을 그대로 둠)
+    """
+    return ["DELETE FROM analysis_jobs WHERE vehicle_id NOT IN (SELECT id FROM illegal_vehicles)"]
+
+
+# (버전, 해당 버전으로 올리는 SQL 목록을 만드는 함수) – 새 마이그레이션은 맨 뒤에 추가
+MIGRATIONS = [
+    (1, _add_primary_key),
+    (2, _add_indexes),
+    (3, _add_analysis_jobs),
+    (4, _add_analysis_cache),
+    (5, _add_bbox),
+    (6, _add_session),
+    (7, _drop_orphan_jobs),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def migrate(conn):
+    """밀린 마이그레이션 적용 후 현재 스키마 버전 반환
+
+    버전마다 BEGIN IMMEDIATE 트랜잭션 하나 → 중간에 실패하면 그 버전은 통째로 롤백되고,
+    여러 프로세스가 동시에 열어도 락을 잡은 뒤 버전을 다시 읽으므로 두 번 적용되지 않음
+    """
+    isolation = conn.isolation_level
+    conn.isolation_level = None     # 트랜잭션을 직접 관리
+    try:
+        for version, build in MIGRATIONS:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                current = conn.execute("PRAGMA user_version").fetchone()[0]
+                if current >= version:
+                    conn.execute("COMMIT")
+                    continue
+                for sql in build(conn):
+                    conn.execute(sql)
+                conn.execute(f"PRAGMA user_version={version}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            print(f"🗄️ DB 스키마 v{version} 적용")
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.isolation_level = isolation
+
+
+class DatabaseManager:
+    def __init__(self, path=DB_PATH, readers=READ_POOL_SIZE):
+        self.path = path
+        conn, _ = init_db()     # 테이블 보장
+        conn.close()
+
+        self._write_lock = threading.RLock()
+        self._write_conn = self._connect()
+        self._write_conn.execute("PRAGMA journal_mode=WAL")
+        self.schema_version = migrate(self._write_conn)
+
+        self._readers = queue.Queue()
+        for _ in range(readers):
+            self._readers.put(self._connect(readonly=True))
+
+    def _connect(self, readonly=False):
+        if readonly:
+            uri = Path(self.path).resolve().as_uri() + "?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=CACHED_STATEMENTS)
+            conn.execute("PRAGMA query_only=1")
+        else:
+            conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=CACHED_STATEMENTS)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")     # 연결마다 켜야 함 (기본값 OFF)
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        return conn
+
+    @contextmanager
+    def reader(self):
+        """읽기 전용 커서 (풀에서 빌렸다가 반납)"""
+        conn = self._readers.get()
+        try:
+            yield conn.cursor()
+        finally:
+            self._readers.put(conn)
+
+    @contextmanager
+    def writer(self):
+        """쓰기 커서 (블록이 끝나면 커밋, 예외면 롤백)"""
+        with self._write_lock:
+            cursor = self._write_conn.cursor()
+            try:
+                yield cursor
+                self._write_conn.commit()
+            except Exception:
+                self._write_conn.rollback()
+                raise
+
+    def close(self):
+        with self._write_lock:
+            self._write_conn.close()
+        while not self._readers.empty():
+            self._readers.get_nowait().close()
+
+
+_db = None
+_db_closed = False
+_db_lock = threading.Lock()
+
+
+def get_db():
+    """프로세스 전역 DatabaseManager (close_db() 뒤에는 다시 열지 않고 RuntimeError)"""
+    global _db
+    with _db_lock:
+        if _db_closed:
+            raise RuntimeError("DB가 이미 닫혔습니다 (종료 중)")
+        if _db is None:
+            _db = DatabaseManager()
+        return _db
+
+
+def close_db():
+    """종료 시 한 번 – 아직 남은 작업 스레드가 get_db()로 DB를 다시 열고 마이그레이션하지 않도록 막음"""
+    global _db, _db_closed
+    with _db_lock:
+        _db_closed = True
+        if _db is not None:
+            _db.close()
+            _db = None
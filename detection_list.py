@@ -0,0 +1,383 @@
+# detection_list.py
+# 탐지 목록 (model/view)
+# - DetectionListModel: illegal_vehicles를 PAGE_SIZE행씩, 스크롤이 끝에 닿을 때만 읽음 (canFetchMore/fetchMore)
+#   → 행마다 위젯을 만들지 않고, 보이는 행만 DetectionDelegate가 직접 그림
+#   썸네일은 ThumbnailService가 백그라운드에서 만들고, 그 전까지는 placeholder
+# - DetectionDetail: 펼친 행 하나에만 붙는 상세 위젯 (큰 이미지 + 분석 결과 + 닫기)
+# - DetectionListView: 행을 클릭하면 펼치기/접기 (한 번에 하나만 펼침)
+# - 행마다 analysis_jobs 상태(대기/실패/재시도 대기)를 같이 들고 있어서 요약에 표시하고,
+#   지금 분석을 맡겨도 되는 행인지(AnalysisDueRole) 알려줌
+import os
+import time
+from PyQt5.QtWidgets import (
+    QListView, QStyledItemDelegate, QFrame, QVBoxLayout, QLabel, QTextEdit, QPushButton, QAbstractItemView,
+)
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QSize, QRect, pyqtSignal
+from PyQt5.QtGui import QPixmap, QColor, QTextCursor
+from db_manager import get_db
+from thumbnail_service import ThumbnailService, THUMB_SIZE, read_scaled
+
+PAGE_SIZE = 100
+ROW_WIDTH = 400
+ROW_HEIGHT = 60
+DETAIL_IMAGE_SIZE = QSize(400, 250)
+DETAIL_HEIGHT = 520         # 펼쳤을 때 행 아래에 붙는 높이
+WAITING_TEXT = "⏳ 분석 대기 중..."
+RUNNING_TEXT = "🧠 분석 중..."
+EMPTY_TEXT = "(결과 없음)"
+FAILED_TEXT = "❌ 분석 실패"
+RETRY_TEXT = "❌ 분석 실패 · 재시도 대기 중"
+
+RowIdRole = Qt.UserRole + 1
+PathRole = Qt.UserRole + 2
+CameraRole = Qt.UserRole + 3
+TimestampRole = Qt.UserRole + 4
+ResultRole = Qt.UserRole + 5
+PreviewRole = Qt.UserRole + 6
+ExpandedRole = Qt.UserRole + 7
+PartialRole = Qt.UserRole + 8       # 스트리밍 중 지금까지 받은 분석 텍스트
+JobStateRole = Qt.UserRole + 9      # analysis_jobs.state (pending/running/done/failed)
+AnalysisDueRole = Qt.UserRole + 10  # 결과가 없고, 실패로 끝나지 않았고, 재시도 시각이 지난 행
+
+
+def _preview(result):
+    return result.strip().splitlines()[0] if result and result.strip() else EMPTY_TEXT
+
+
+def _job_preview(state, next_attempt_at):
+    """결과가 없는 행의 요약 (작업 상태 기준)"""
+    if state == "failed":
+        return FAILED_TEXT
+    if state == "running":
+        return RUNNING_TEXT
+    if state == "pending" and (next_attempt_at or 0) > time.time():
+        return RETRY_TEXT
+    return WAITING_TEXT
+
+
+def _record(rowid, timestamp, path, cctvname, result=None, job_state="pending", next_attempt_at=0.0):
+    return {
+        "id": rowid,
+        "timestamp": timestamp,
+        "path": path,
+        "cctvname": cctvname,
+        "result": result,
+        "partial": None,
+        "job_state": job_state,
+        "next_attempt_at": next_attempt_at or 0.0,
+        "preview": _preview(result) if result else _job_preview(job_state, next_attempt_at),
+    }
+
+
+def _analysis_due(rec):
+    return (not rec["result"] and rec["job_state"] in (None, "pending")
+            and rec["next_attempt_at"] <= time.time())
+
+
+class DetectionListModel(QAbstractListModel):
+    """illegal_vehicles 행 목록 (id 내림차순 = 최신 순)"""
+
+    def __init__(self, parent=None, page_size=PAGE_SIZE, thumbnails=None):
+        super().__init__(parent)
+        self.page_size = page_size
+        self.thumbnails = thumbnails or ThumbnailService(parent=self)
+        self.thumbnails.ready.connect(self._on_thumbnail)
+        self._rows = []
+        self._path_ids = {}         # image_path -> rowid (썸네일 완료 알림용)
+        self._oldest_id = None      # 다음 페이지는 이 id보다 작은 행부터
+        self._exhausted = False
+        self.expanded_id = None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        # 파일이 지워진 행은 건너뛰므로, 보여줄 행이 생기거나 끝날 때까지 다음 페이지를 읽음
+        while not parent.isValid() and not self._exhausted:
+            with get_db().reader() as cursor:
+                cursor.execute(f"""SELECT v.id, v.timestamp, v.image_path, v.cctvname, v.analysis_result,
+                                          j.state, j.next_attempt_at
+                                   FROM illegal_vehicles v LEFT JOIN analysis_jobs j ON j.vehicle_id = v.id
+                                   {"" if self._oldest_id is None else "WHERE v.id < :oldest"}
+                                   ORDER BY v.id DESC LIMIT :limit""",
+                               {"oldest": self._oldest_id, "limit": self.page_size})
+                page = cursor.fetchall()
+            if len(page) < self.page_size:
+                self._exhausted = True
+            if not page:
+                return
+            self._oldest_id = page[-1][0]
+            rows = [_record(*row) for row in page if os.path.exists(row[2])]
+            if rows:
+                first = len(self._rows)
+                self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+                self._rows.extend(rows)
+                self._path_ids.update((rec["path"], rec["id"]) for rec in rows)
+                self.endInsertRows()
+                return
+
+    def prepend_rows(self, rows):
+        """새 탐지 [(rowid, timestamp, path, cctvname), ...]를 맨 위에 한 번에 추가"""
+        newest = self._rows[0]["id"] if self._rows else 0
+        rows = sorted((r for r in rows if r[0] > newest), key=lambda r: r[0], reverse=True)
+        if not rows:
+            return
+        if self._oldest_id is None:
+            # 첫 페이지를 읽기 전이면 그보다 오래된 행부터 읽도록
+            self._oldest_id = rows[-1][0]
+        self.beginInsertRows(QModelIndex(), 0, len(rows) - 1)
+        self._rows[:0] = [_record(*r) for r in rows]
+        self._path_ids.update((r[2], r[0]) for r in rows)
+        self.endInsertRows()
+
+    def row_of(self, rowid):
+        """rowid의 행 번호 (아직 안 읽었으면 -1)"""
+        lo, hi = 0, len(self._rows)
+        while lo < hi:      # id 내림차순 이진 탐색
+            mid = (lo + hi) // 2
+            if self._rows[mid]["id"] > rowid:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < len(self._rows) and self._rows[lo]["id"] == rowid else -1
+
+    def index_of(self, rowid):
+        row = self.row_of(rowid)
+        return self.index(row) if row >= 0 else QModelIndex()
+
+    def _update(self, rowid, **fields):
+        row = self.row_of(rowid)
+        if row < 0:
+            return
+        self._rows[row].update(fields)
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def _on_thumbnail(self, path):
+        row = self.row_of(self._path_ids.get(path, -1))
+        if row >= 0:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+    def _reload_job(self, rowid):
+        """작업 상태를 DB에서 다시 읽음 (실패 후 재시도 일정 등은 analysis_jobs가 정함)"""
+        with get_db().reader() as cursor:
+            cursor.execute("SELECT state, next_attempt_at FROM analysis_jobs WHERE vehicle_id = ?", (rowid,))
+            row = cursor.fetchone()
+        state, next_attempt_at = row if row else (None, 0.0)
+        return {"job_state": state, "next_attempt_at": next_attempt_at or 0.0}
+
+    def set_running(self, rowid):
+        self._update(rowid, job_state="running", preview=RUNNING_TEXT)
+
+    def set_waiting(self, rowid):
+        # 다른 워커가 처리 중이거나 재시도 시각 전 → 실제 작업 상태를 표시
+        job = self._reload_job(rowid)
+        self._update(rowid, partial=None, preview=_job_preview(job["job_state"], job["next_attempt_at"]), **job)
+
+    def set_partial(self, rowid, text):
+        # 앞부분(판정)이 먼저 오므로 첫 줄을 바로 요약에 표시
+        if text.strip():
+            self._update(rowid, partial=text, preview=_preview(text))
+
+    def set_result(self, rowid, result):
+        self._update(rowid, result=result, partial=None, job_state="done", preview=_preview(result))
+
+    def set_failed(self, rowid, error=""):
+        # 중간까지 받은 스트리밍 텍스트는 버림 (상세도 "분석 중"으로 남지 않도록)
+        job = self._reload_job(rowid)
+        preview = RETRY_TEXT if job["job_state"] == "pending" else FAILED_TEXT
+        self._update(rowid, partial=None, preview=preview, **job)
+
+    def set_expanded(self, rowid):
+        self.expanded_id = rowid
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._rows):
+            return None
+        rec = self._rows[index.row()]
+        if role == Qt.DisplayRole:
+            return f"[{rec['cctvname']}] {rec['timestamp']}"
+        if role == Qt.DecorationRole:
+            return self.thumbnails.get(rec["path"]) or self.thumbnails.placeholder
+        if role == RowIdRole:
+            return rec["id"]
+        if role == PathRole:
+            return rec["path"]
+        if role == CameraRole:
+            return rec["cctvname"]
+        if role == TimestampRole:
+            return rec["timestamp"]
+        if role == ResultRole:
+            return rec["result"]
+        if role == PreviewRole:
+            return rec["preview"]
+        if role == PartialRole:
+            return rec["partial"]
+        if role == JobStateRole:
+            return rec["job_state"]
+        if role == AnalysisDueRole:
+            return _analysis_due(rec)
+        if role == ExpandedRole:
+            return rec["id"] == self.expanded_id
+        return None
+
+
+class DetectionDelegate(QStyledItemDelegate):
+    """썸네일 + [카메라] 시각 + 분석 요약 한 줄"""
+
+    def sizeHint(self, option, index):
+        height = ROW_HEIGHT + (DETAIL_HEIGHT if index.data(ExpandedRole) else 0)
+        return QSize(ROW_WIDTH, height)
+
+    def paint(self, painter, option, index):
+        painter.save()
+        rect = option.rect
+        thumb_rect = QRect(rect.x() + 5, rect.y() + 5, THUMB_SIZE.width(), THUMB_SIZE.height())
+        pixmap = index.data(Qt.DecorationRole)
+        if pixmap is not None and not pixmap.isNull():
+            target = pixmap.size().scaled(THUMB_SIZE, Qt.KeepAspectRatio)
+            painter.drawPixmap(QRect(thumb_rect.topLeft(), target), pixmap)
+
+        text_x = thumb_rect.right() + 10
+        header_rect = QRect(text_x, rect.y() + 5, rect.right() - text_x - 5, 20)
+        painter.setPen(option.palette.text().color())
+        painter.drawText(header_rect, Qt.AlignLeft | Qt.AlignVCenter, index.data(Qt.DisplayRole))
+
+        font = painter.font()
+        font.setPixelSize(12)
+        painter.setFont(font)
+        painter.setPen(QColor("gray"))
+        preview_rect = QRect(text_x, rect.y() + 27, header_rect.width(), 20)
+        preview = painter.fontMetrics().elidedText(index.data(PreviewRole) or "", Qt.ElideRight, preview_rect.width())
+        painter.drawText(preview_rect, Qt.AlignLeft | Qt.AlignVCenter, preview)
+        painter.restore()
+
+
+class DetectionDetail(QFrame):
+    """펼친 행의 상세 (위쪽 ROW_HEIGHT는 delegate가 그린 행이 보이도록 비워 둠)"""
+    closed = pyqtSignal()
+
+    def __init__(self, path, result=None, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(5, ROW_HEIGHT, 5, 5)
+
+        self.expand_frame = QFrame()
+        self.expand_frame.setStyleSheet("background-color: #f9f9f9; border: 1px solid #ccc;")
+        expand_layout = QVBoxLayout(self.expand_frame)
+
+        self.image_label = QLabel()
+        self.image_label.setAlignment(Qt.AlignCenter)
+        self.image_label.setFixedHeight(350)
+        if os.path.exists(path):
+            self.image_label.setPixmap(QPixmap.fromImage(read_scaled(path, DETAIL_IMAGE_SIZE)))
+
+        self.chat_display = QTextEdit()
+        self.chat_display.setReadOnly(True)
+        self.set_result(result)
+
+        self.close_button = QPushButton("닫기")
+        self.close_button.clicked.connect(self.closed.emit)
+
+        expand_layout.addWidget(self.image_label)
+        expand_layout.addWidget(self.chat_display)
+        expand_layout.addWidget(self.close_button)
+        layout.addWidget(self.expand_frame)
+
+    def set_result(self, result):
+        if result:
+            self.chat_display.setText(f"분석 결과:\n{result}")
+        else:
+            self.chat_display.setText("아직 분석되지 않았습니다.")
+
+    def set_partial(self, text):
+        self.chat_display.setPlainText(f"🧠 분석 중...\n{text}")
+        self.chat_display.moveCursor(QTextCursor.End)
+
+    def mousePressEvent(self, event):
+        # 행(헤더) 부분을 다시 누르면 접기
+        if event.y() < ROW_HEIGHT:
+            self.closed.emit()
+        else:
+            super().mousePressEvent(event)
+
+
+class DetectionListView(QListView):
+    expanded = pyqtSignal(int)      # 펼친 행의 rowid
+    collapsed = pyqtSignal(int)     # 접은 행의 rowid
+
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self.setModel(model)
+        self.delegate = DetectionDelegate(self)
+        self.setItemDelegate(self.delegate)
+        self.setUniformItemSizes(False)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setSelectionMode(QAbstractItemView.NoSelection)
+        self.detail = None
+        self.clicked.connect(self.toggle_expand)
+        model.dataChanged.connect(self._refresh_detail)
+
+    def toggle_expand(self, index):
+        rowid = index.data(RowIdRole)
+        expanding = self.model().expanded_id != rowid
+        self.collapse()
+        if expanding:
+            self.expand(index)
+
+    def expand(self, index):
+        model = self.model()
+        model.set_expanded(index.data(RowIdRole))
+        self.delegate.sizeHintChanged.emit(index)
+        self.detail = DetectionDetail(index.data(PathRole), index.data(ResultRole))
+        if not index.data(ResultRole) and index.data(PartialRole):
+            self.detail.set_partial(index.data(PartialRole))
+        self.detail.closed.connect(self.collapse)
+        self.setIndexWidget(index, self.detail)
+        self.scrollTo(index)
+        self.expanded.emit(index.data(RowIdRole))
+
+    def collapse(self):
+        model = self.model()
+        if model.expanded_id is None:
+            return
+        rowid = model.expanded_id
+        index = model.index_of(rowid)
+        model.set_expanded(None)
+        self.detail = None
+        if index.isValid():
+            self.setIndexWidget(index, None)    # 이전 위젯은 Qt가 deleteLater
+            self.delegate.sizeHintChanged.emit(index)
+        self.collapsed.emit(rowid)
+
+    def visible_rows(self):
+        """뷰포트에 보이는 행의 index 목록 (위에서부터)"""
+        model = self.model()
+        viewport = self.viewport().rect()
+        top = self.indexAt(viewport.topLeft())
+        if not top.isValid():
+            return []
+        rows = []
+        for row in range(top.row(), model.rowCount()):
+            index = model.index(row)
+            if self.visualRect(index).top() > viewport.bottom():
+                break
+            rows.append(index)
+        return rows
+
+    def _refresh_detail(self, top_left, bottom_right):
+        # 펼친 행의 분석 진행/결과를 상세에도 반영
+        if self.detail is None:
+            return
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            index = self.model().index(row)
+            if index.data(RowIdRole) != self.model().expanded_id:
+                continue
+            if not index.data(ResultRole) and index.data(PartialRole):
+                self.detail.set_partial(index.data(PartialRole))
+            else:
+                self.detail.set_result(index.data(ResultRole))
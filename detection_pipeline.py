@@ -0,0 +1,119 @@
+# detection_pipeline.py
+# 탐지 결과 → 저장까지 공통 처리 (스레드 워커, 탐지 프로세스 둘 다 사용)
+# - StreamPipeline: update_tracks → 레코드 변환 → 매칭 → 증거 저장 큐 (스트림마다 하나)
+# - SeenTrackCache: 이미 저장한 track id를 메모리에 기억해서 매 프레임 SQLite 조회를 피함
+#   키는 (cctvname, track_id) → 다른 카메라 워커가 같은 track id를 써도 안 겹침
+#   DB 확인은 같은 트래커 세션 안에서만 (track id는 트래커를 새로 만들 때마다 다시 시작)
+#   트랙이 ttl초 동안 다시 안 보이면(트래커에서 만료됐다고 보고) 캐시에서도 제거
+import time
+import uuid
+from collections import OrderedDict
+from Detection.tracker import init_tracker, update_tracks
+from box_matching import match_records
+from detection_records import StreamRecords
+from evidence_writer import get_evidence_writer
+from db_manager import get_db
+
+SEEN_TTL = 30.0         # 마지막으로 본 뒤 이 시간이 지나면 만료(초)
+SEEN_MAX = 2048
+
+
+class SeenTrackCache:
+    def __init__(self, cctvname, session=None, ttl=SEEN_TTL, max_size=SEEN_MAX, clock=time.monotonic):
+        self.cctvname = cctvname
+        self.session = session
+        self.ttl = ttl
+        self.max_size = max_size
+        self.clock = clock
+        self._entries = OrderedDict()   # (cctvname, track_id) -> 마지막으로 본 시각
+
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def _key(self, track_id):
+        return (self.cctvname, track_id)
+
+    def _expire(self, now):
+        # 오래된 것부터 정렬돼 있으므로 앞에서부터 지움
+        while self._entries:
+            key, seen_at = next(iter(self._entries.items()))
+            if now - seen_at <= self.ttl and len(self._entries) <= self.max_size:
+                break
+            del self._entries[key]
+            self.evicted += 1
+
+    def touch(self, track_id):
+        """저장된 트랙으로 기록 (이미 있으면 만료 시간 연장)"""
+        now = self.clock()
+        key = self._key(track_id)
+        self._entries[key] = now
+        self._entries.move_to_end(key)
+        self._expire(now)
+
+    def is_saved(self, track_id):
+        """캐시에 있으면 바로 True, 없을 때만 DB 확인"""
+        now = self.clock()
+        self._expire(now)
+        if self._key(track_id) in self._entries:
+            self.hits += 1
+            self.touch(track_id)
+            return True
+
+        self.misses += 1
+        # 카메라, 트래커 세션까지 같아야 같은 트랙 ((cctvname, session, track_id) 인덱스 사용)
+        with get_db().reader() as cursor:
+            cursor.execute("SELECT 1 FROM illegal_vehicles WHERE cctvname = ? AND session IS ? AND track_id = ? LIMIT 1",
+                           (self.cctvname, self.session, track_id))
+            found = cursor.fetchone() is not None
+        if found:
+            self.touch(track_id)
+            return True
+        return False
+
+    def stats(self):
+        return {"seen_cached": len(self._entries), "seen_hits": self.hits,
+                "seen_misses": self.misses, "seen_evicted": self.evicted}
+
+
+def save_new_illegal(frame, records, illegal_boxes, seen, writer, cctvname, on_saved=None):
+    """매칭된 불법 적재 레코드 중 아직 저장 안 된 트랙만 저장 큐에 넣고, 넣은 track id 목록 반환
+
+    실제 파일/DB 저장은 EvidenceWriter가 하고, 커밋되면 on_saved(rowid, timestamp, path, cctvname, track_id) 호출
+    """
+    saved = []
+    hits = records[records["illegal"] & (records["track_id"] >= 0)]
+    for track_id, src in zip(hits["track_id"].tolist(), hits["src"].tolist()):
+        if seen.is_saved(track_id):
+            continue
+        if not writer.submit(frame, illegal_boxes[src], track_id, cctvname, on_saved, session=seen.session):
+            continue
+        # 아직 DB에 안 들어갔어도 캐시에 먼저 기록 → 중복 저장 방지
+        seen.touch(track_id)
+        saved.append(track_id)
+    return saved
+
+
+class StreamPipeline:
+    """스트림 하나의 추적/매칭/저장 상태"""
+
+    def __init__(self, cctvname, writer=None, on_saved=None):
+        self.cctvname = cctvname
+        self.tracker = init_tracker()
+        self.session = uuid.uuid4().hex[:16]    # 이 트래커가 만든 track id의 범위 (DB session 열)
+        self.records = StreamRecords()
+        self.seen = SeenTrackCache(cctvname, self.session)
+        self.writer = writer or get_evidence_writer()
+        self.on_saved = on_saved
+
+    def process(self, frame, detections, illegal_boxes):
+        """(저장 큐에 넣은 track id 목록, 확정 트랙 수, 불법 후보 수) 반환"""
+        tracks = update_tracks(self.tracker, detections)
+        det = self.records.load_detections(detections, illegal_boxes)
+        trk = self.records.load_tracks(tracks)
+        match_records(det, trk)
+        saved = save_new_illegal(frame, det, illegal_boxes, self.seen, self.writer, self.cctvname, self.on_saved)
+        return saved, len(trk), len(illegal_boxes)
+
+    def stats(self):
+        return {**self.seen.stats(), **self.writer.stats()}
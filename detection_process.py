@@ -0,0 +1,404 @@
+# detection_process.py
+# GIL을 피하기 위한 멀티프로세스 탐지 엔진
+# - GUI 프로세스: 최신 프레임을 공유 메모리 링 버퍼(FrameRing)에 복사하고 슬롯 번호만 큐로 보냄
+#   (프레임 자체는 pickle 하지 않음)
+# - 탐지 프로세스: 링 버퍼에서 바로 읽어 MotionGate → 배치 추론 → update_tracks → DB 저장까지 처리
+# - 결과는 작은 튜플로 결과 큐에 돌려줌
+#     ("done", stream_id, slot, captured_at, MotionGate 통과 여부, (트랙 수, 후보 수) 또는 None, 탐지 쪽 카운터)
+#     ("detection", stream_id, rowid, timestamp, image_path, cctvname, track_id)
+#     ("closed", stream_id) – 이 응답을 받은 뒤에야 GUI 쪽이 링 버퍼를 unlink
+#     ("failed", stream_id, 오류) – 링 버퍼에 붙지 못한 스트림 (다른 스트림은 계속 처리)
+# - GUI 쪽은 LIVENESS_INTERVAL마다 탐지 프로세스가 살아 있는지 확인해서 죽으면 on_error로 알림
+import os
+import time
+import queue
+import itertools
+import threading
+import traceback
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import cv2
+import numpy as np
+from batch_inference import detect_vehicles_batch
+from model_pool import get_model_pool, MODEL_PATH
+from frame_sampler import FrameSampler
+from motion_gate import MotionGate
+from detection_pipeline import StreamPipeline
+from evidence_writer import stop_evidence_writer
+from db_manager import close_db
+
+DETECTOR_PROCS = int(os.getenv("DETECTOR_PROCS", "1"))
+RING_SLOTS = 4
+MAX_FRAME_SHAPE = (1080, 1920, 3)
+MAX_BATCH = 8
+MAX_WAIT = 0.03
+LIVENESS_INTERVAL = 1.0     # 탐지 프로세스 생존 확인 주기(초)
+
+
+def _attach_shm(name):
+    """다른 프로세스가 만든 공유 메모리에 붙기 (정리(unlink)는 만든 쪽에서만)"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)    # Python 3.13+
+    except TypeError:
+        # spawn으로 띄운 자식은 부모와 resource_tracker를 공유하므로 따로 해제하지 않음
+        return shared_memory.SharedMemory(name=name)
+
+
+class FrameRing:
+    """스트림 하나당 공유 메모리 프레임 슬롯 N개"""
+
+    def __init__(self, slots=RING_SLOTS, max_shape=MAX_FRAME_SHAPE, name=None):
+        self.slots = slots
+        self.max_shape = tuple(max_shape)
+        self.slot_bytes = int(np.prod(self.max_shape))
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=self.slot_bytes * slots)
+        else:
+            self.shm = _attach_shm(name)
+        self.name = self.shm.name
+        self._array = np.ndarray((slots, self.slot_bytes), dtype=np.uint8, buffer=self.shm.buf)
+
+    def write(self, slot, frame):
+        h, w = frame.shape[:2]
+        max_h, max_w = self.max_shape[:2]
+        if h > max_h or w > max_w:
+            scale = min(max_h / h, max_w / w)
+            frame = cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+        shape = frame.shape
+        # copyto는 VLC 버퍼의 BGR 뷰처럼 연속되지 않은 배열도 그대로 복사
+        np.copyto(self._array[slot, :frame.size].reshape(shape), frame)
+        return shape
+
+    def read(self, slot, shape):
+        return self._array[slot, :int(np.prod(shape))].reshape(shape)
+
+    def close(self):
+        self._array = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+# ───────────────────────── 탐지 프로세스 ─────────────────────────
+
+class _StreamState:
+    def __init__(self, stream_id, cctvname, ring_name, slots, max_shape, results):
+        self.cctvname = cctvname
+        self.ring = FrameRing(slots, max_shape, name=ring_name)
+        self.gate = MotionGate.for_camera(cctvname)
+
+        # 증거가 커밋되면 GUI 프로세스로 알림 (EvidenceWriter 스레드에서 호출됨)
+        def on_saved(rowid, timestamp, path, cctvname, track_id):
+            results.put(("detection", stream_id, rowid, timestamp, path, cctvname, track_id))
+
+        self.pipeline = StreamPipeline(cctvname, on_saved=on_saved)
+
+    def stats(self):
+        """탐지 프로세스 안에만 있는 카운터 (MotionGate 스킵, 저장 캐시/큐)"""
+        return {**self.gate.stats(), **self.pipeline.stats()}
+
+
+def _process_batch(batch, streams, model, results):
+    pending = []
+    for _, stream_id, slot, shape, captured_at in batch:
+        st = streams.get(stream_id)
+        if st is None:
+            continue
+        frame = st.ring.read(slot, shape)
+        if not st.gate.check(frame):
+            results.put(("done", stream_id, slot, captured_at, False, None, st.stats()))
+            continue
+        pending.append((stream_id, st, slot, frame, captured_at))
+    if not pending:
+        return
+
+    try:
+        outputs = detect_vehicles_batch(model, [frame for _, _, _, frame, _ in pending])
+    except Exception:
+        traceback.print_exc()
+        outputs = [None] * len(pending)
+
+    for (stream_id, st, slot, frame, captured_at), output in zip(pending, outputs):
+        info = None
+        try:
+            if output is not None:
+                detections, illegal_boxes = output
+                _, num_tracks, num_candidates = st.pipeline.process(frame, detections, illegal_boxes)
+                info = (num_tracks, num_candidates)
+        except Exception:
+            traceback.print_exc()
+        # 슬롯 반납은 프레임을 다 쓴 뒤에
+        results.put(("done", stream_id, slot, captured_at, True, info, st.stats()))
+
+
+def detector_main(requests, results, model_path, max_batch=MAX_BATCH, max_wait=MAX_WAIT):
+    """탐지 프로세스 진입점 (spawn으로 실행되므로 모듈 최상위 함수여야 함)"""
+    handle = get_model_pool().acquire(model_path)
+    streams = {}
+    results.put(("ready", os.getpid()))
+
+    running = True
+    try:
+        while running:
+            batch = []
+            deadline = None
+            msg = requests.get()
+            while True:
+                kind = msg[0]
+                if kind == "frame":
+                    batch.append(msg)
+                    if deadline is None:
+                        deadline = time.monotonic() + max_wait
+                elif kind == "open":
+                    _, stream_id, cctvname, ring_name, slots, max_shape = msg
+                    try:
+                        streams[stream_id] = _StreamState(stream_id, cctvname, ring_name, slots, max_shape, results)
+                    except Exception as e:
+                        # 스트림 하나가 실패해도 탐지 루프는 계속
+                        traceback.print_exc()
+                        results.put(("failed", stream_id, repr(e)))
+                elif kind == "close":
+                    st = streams.pop(msg[1], None)
+                    if st:
+                        st.ring.close()
+                    results.put(("closed", msg[1]))
+                elif kind == "stop":
+                    running = False
+                    break
+
+                # 배치가 찼거나, 열린 스트림이 모두 한 장씩 보냈으면 바로 처리
+                if len(batch) >= max_batch or (batch and len({m[1] for m in batch}) >= len(streams)):
+                    break
+                try:
+                    if deadline is None:
+                        msg = requests.get()
+                    else:
+                        msg = requests.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+
+            if batch:
+                _process_batch(batch, streams, handle.model, results)
+    finally:
+        for st in streams.values():
+            st.ring.close()
+        stop_evidence_writer()
+        close_db()
+        handle.release()
+        results.put(("stopped", os.getpid()))
+
+
+# ───────────────────────── GUI 프로세스 쪽 ─────────────────────────
+
+class StreamFeeder:
+    """한 스트림의 프레임을 탐지 프로세스로 보내는 쪽 (슬롯이 모두 사용 중이면 프레임 버림)"""
+
+    def __init__(self, engine, stream_id, cctvname, requests, ring, on_detection=None):
+        self.engine = engine
+        self.stream_id = stream_id
+        self.cctvname = cctvname
+        self.requests = requests
+        self.ring = ring
+        self.on_detection = on_detection
+        self.sampler = FrameSampler()
+        self.closing = False        # "close"를 보냈고 "closed" 응답을 기다리는 중
+        self.orphaned = False       # 맡은 탐지 프로세스가 죽음 (응답이 오지 않음)
+        self.error = None
+
+        self._lock = threading.Lock()
+        self._free = set(range(ring.slots))
+        self.sent = 0
+        self.dropped = 0
+        self.detector_stats = {}
+        self.latency_ms = 0.0
+        self.latency_ms_max = 0.0
+
+    def submit(self, frame, captured_at):
+        if self.error is not None:
+            return False
+        with self._lock:
+            if not self._free:
+                self.dropped += 1
+                return False
+            slot = self._free.pop()
+        shape = self.ring.write(slot, frame)
+        self.requests.put(("frame", self.stream_id, slot, shape, captured_at))
+        self.sent += 1
+        return True
+
+    def _on_done(self, slot, captured_at, passed, info, detector_stats):
+        with self._lock:
+            self._free.add(slot)
+        self.detector_stats = detector_stats
+        if not passed:
+            # 추론하지 않은 프레임 → 실효 fps에서 빼기 (스레드 모드와 같은 처리)
+            self.sampler.mark_skipped()
+            return
+        if info is None:
+            return
+        self.sampler.update(*info)
+        self.latency_ms = (time.monotonic() - captured_at) * 1000
+        self.latency_ms_max = max(self.latency_ms_max, self.latency_ms)
+
+    def close(self):
+        self.engine.close_stream(self)
+
+    def stats(self):
+        return {
+            **self.sampler.stats(),
+            **self.detector_stats,
+            "sent": self.sent,
+            "slot_full_dropped": self.dropped,
+            "latency_ms": round(self.latency_ms, 1),
+            "latency_ms_max": round(self.latency_ms_max, 1),
+        }
+
+
+class DetectionEngine:
+    def __init__(self, model_path=MODEL_PATH, num_procs=DETECTOR_PROCS, slots=RING_SLOTS,
+                 max_shape=MAX_FRAME_SHAPE, max_batch=MAX_BATCH, max_wait=MAX_WAIT, on_error=None):
+        self.model_path = model_path
+        self.num_procs = num_procs
+        self.slots = slots
+        self.max_shape = max_shape
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.on_error = on_error        # on_error(메시지) – 결과 수신 스레드에서 호출됨
+
+        self._ctx = mp.get_context("spawn")
+        self._procs = []
+        self._requests = []
+        self._results = None
+        self._listener = None
+        self._feeders = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._dead = set()
+        self._stopping = False
+
+    def start(self):
+        """탐지 프로세스 시작 (각 프로세스가 모델 로드 + 워밍업)"""
+        self._results = self._ctx.Queue()
+        for _ in range(self.num_procs):
+            requests = self._ctx.Queue()
+            proc = self._ctx.Process(
+                target=detector_main,
+                args=(requests, self._results, self.model_path, self.max_batch, self.max_wait),
+                daemon=True,
+            )
+            proc.start()
+            self._requests.append(requests)
+            self._procs.append(proc)
+        self._listener = threading.Thread(target=self._listen, daemon=True)
+        self._listener.start()
+
+    def open_stream(self, cctvname, on_detection=None):
+        stream_id = next(self._ids)
+        requests = self._requests[stream_id % len(self._requests)]
+        ring = FrameRing(self.slots, self.max_shape)
+        feeder = StreamFeeder(self, stream_id, cctvname, requests, ring, on_detection)
+        with self._lock:
+            self._feeders[stream_id] = feeder
+        requests.put(("open", stream_id, cctvname, ring.name, self.slots, self.max_shape))
+        return feeder
+
+    def close_stream(self, feeder):
+        """탐지 프로세스에 닫기 요청 – 링 버퍼 unlink는 "closed" 응답을 받은 뒤에
+        (탐지 프로세스가 아직 "open"을 처리하지 않았어도 링 버퍼에 붙을 수 있도록)
+        """
+        with self._lock:
+            if feeder.closing or self._feeders.get(feeder.stream_id) is not feeder:
+                return
+            feeder.closing = True
+        feeder.requests.put(("close", feeder.stream_id))
+        if feeder.orphaned:
+            self._release(feeder.stream_id)
+
+    def _release(self, stream_id):
+        with self._lock:
+            feeder = self._feeders.pop(stream_id, None)
+        if feeder is not None:
+            feeder.ring.close()
+
+    def _report(self, message):
+        print(f"❌ {message}")
+        if self.on_error:
+            self.on_error(message)
+
+    def _check_alive(self):
+        """죽은 탐지 프로세스를 알리고, 그 프로세스가 맡은 스트림은 더 이상 응답을 기다리지 않음"""
+        if self._stopping:
+            return
+        for proc, requests in zip(list(self._procs), list(self._requests)):
+            if proc.is_alive() or proc.pid in self._dead:
+                continue
+            self._dead.add(proc.pid)
+            self._report(f"탐지 프로세스가 종료됨 (pid={proc.pid}, exitcode={proc.exitcode})")
+            with self._lock:
+                feeders = [f for f in self._feeders.values() if f.requests is requests]
+            for feeder in feeders:
+                feeder.error = "탐지 프로세스 종료"
+                feeder.orphaned = True
+                if feeder.closing:
+                    self._release(feeder.stream_id)
+
+    def _listen(self):
+        last_check = time.monotonic()
+        while True:
+            try:
+                msg = self._results.get(timeout=LIVENESS_INTERVAL)
+            except queue.Empty:
+                msg = ()
+            if time.monotonic() - last_check >= LIVENESS_INTERVAL:
+                last_check = time.monotonic()
+                self._check_alive()
+            if msg is None:
+                return
+            if not msg:
+                continue
+            kind = msg[0]
+            if kind == "ready":
+                print(f"🧠 탐지 프로세스 준비 완료 (pid={msg[1]})")
+                continue
+            if kind == "stopped":
+                continue
+            if kind == "closed":
+                self._release(msg[1])
+                continue
+            with self._lock:
+                feeder = self._feeders.get(msg[1])
+            if feeder is None:
+                continue
+            if kind == "failed":
+                feeder.error = msg[2]
+                self._report(f"[{feeder.cctvname}] 탐지 시작 실패: {msg[2]}")
+            elif kind == "done":
+                feeder._on_done(*msg[2:])
+            elif kind == "detection" and feeder.on_detection:
+                feeder.on_detection(*msg[2:])
+
+    def stop(self):
+        self._stopping = True
+        with self._lock:
+            feeders = list(self._feeders.values())
+        for feeder in feeders:
+            self.close_stream(feeder)
+        for requests in self._requests:
+            requests.put(("stop",))
+        for proc in self._procs:
+            proc.join(timeout=5.0)
+            if proc.is_alive():
+                proc.terminate()
+        if self._results is not None:
+            self._results.put(None)
+        if self._listener is not None:
+            self._listener.join(timeout=2.0)
+        # 응답을 못 받은 링 버퍼는 탐지 프로세스가 끝난 지금 정리
+        with self._lock:
+            leftover = list(self._feeders.values())
+            self._feeders.clear()
+        for feeder in leftover:
+            feeder.ring.close()
+        self._procs.clear()
+        self._requests.clear()
@@ -0,0 +1,129 @@
+# detection_records.py
+# 탐지/트랙 결과를 담는 구조화 numpy 레코드
+# detect_vehicles / update_tracks 결과를 프레임마다 한 번만 레코드로 옮기고,
+# 그 뒤 매칭(box_matching.match_records) → 저장까지는 같은 배열을 제자리에서 사용
+# 버퍼는 스트림마다 미리 잡아두고 매 프레임 재사용 (모자랄 때만 2배로 키움)
+import numpy as np
+from box_matching import iou_matrix
+
+RECORD_DTYPE = np.dtype([
+    ("xyxy", np.float32, (4,)),
+    ("score", np.float32),
+    ("cls", np.int16),
+    ("illegal", np.bool_),
+    ("track_id", np.int32),     # -1: 매칭 안 됨
+    ("src", np.int16),          # illegal_boxes 안의 원래 인덱스 (-1: 없음)
+])
+INITIAL_CAPACITY = 256
+SAME_BOX_IOU = 0.9      # 불법 박스와 탐지 박스를 같은 것으로 보는 기준
+
+
+class RecordBuffer:
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        self._buf = np.zeros(capacity, dtype=RECORD_DTYPE)
+        self.size = 0
+
+    def reset(self, n):
+        if n > len(self._buf):
+            capacity = len(self._buf)
+            while capacity < n:
+                capacity *= 2
+            self._buf = np.zeros(capacity, dtype=RECORD_DTYPE)
+        self.size = n
+        view = self._buf[:n]
+        view["score"] = 0.0
+        view["cls"] = -1
+        view["illegal"] = False
+        view["track_id"] = -1
+        view["src"] = -1
+        return view
+
+    def view(self):
+        return self._buf[:self.size]
+
+
+def _detection_fields(det):
+    """detect_vehicles가 주는 탐지 하나 → (x1, y1, x2, y2), score, cls
+
+    deep_sort 입력 형식 ([l, t, w, h], conf, cls)과 [x1, y1, x2, y2, (conf), (cls)] 둘 다 처리
+    """
+    if len(det) == 3 and np.ndim(det[0]) == 1:
+        (l, t, w, h), score, cls = det
+        return (l, t, l + w, t + h), score, cls
+    score = det[4] if len(det) > 4 else 0.0
+    cls = det[5] if len(det) > 5 else -1
+    return det[:4], score, cls
+
+
+def _track_id(track_id):
+    try:
+        return int(track_id)
+    except (TypeError, ValueError):
+        return -1
+
+
+def _class_id(cls):
+    """정수 클래스만 그대로, 'truck' 같은 이름이나 None은 -1"""
+    try:
+        return int(cls)
+    except (TypeError, ValueError):
+        return -1
+
+
+class StreamRecords:
+    """스트림 하나의 탐지/트랙 레코드 버퍼"""
+
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        self.detections = RecordBuffer(capacity)
+        self.tracks = RecordBuffer(capacity)
+
+    def load_detections(self, detections, illegal_boxes):
+        n = len(detections)
+        extra = []
+        rec = self.detections.reset(n)
+        for i, det in enumerate(detections):
+            xyxy, score, cls = _detection_fields(det)
+            rec["xyxy"][i] = xyxy
+            rec["score"][i] = score
+            rec["cls"][i] = _class_id(cls)
+
+        # 🔹 불법 박스를 탐지 행에 표시 (탐지 목록에 없는 박스는 행을 추가)
+        if len(illegal_boxes):
+            boxes = np.asarray([b[:4] for b in illegal_boxes], dtype=np.float32)
+            best = iou_matrix(boxes, rec["xyxy"]) if n else np.zeros((len(boxes), 0), dtype=np.float32)
+            for i in range(len(boxes)):
+                j = int(best[i].argmax()) if n else -1
+                if j >= 0 and best[i, j] >= SAME_BOX_IOU and not rec["illegal"][j]:
+                    rec["illegal"][j] = True
+                    rec["src"][j] = i
+                else:
+                    extra.append(i)
+
+        if extra:
+            # 버퍼를 키워야 할 수 있으므로 지금까지 내용을 잠깐 보관
+            saved = rec.copy()
+            rec = self.detections.reset(n + len(extra))
+            rec[:n] = saved
+            for k, i in enumerate(extra):
+                box = illegal_boxes[i]
+                rec["xyxy"][n + k] = box[:4]
+                rec["score"][n + k] = box[4] if len(box) > 4 else 0.0
+                rec["illegal"][n + k] = True
+                rec["src"][n + k] = i
+        return rec
+
+    def load_tracks(self, tracks):
+        confirmed = [t for t in tracks if not hasattr(t, "is_confirmed") or t.is_confirmed()]
+        rec = self.tracks.reset(len(confirmed))
+        for i, t in enumerate(confirmed):
+            if hasattr(t, "to_ltrb"):
+                rec["xyxy"][i] = t.to_ltrb()[:4]
+                rec["track_id"][i] = _track_id(t.track_id)
+                score = getattr(t, "det_conf", None)
+                cls = getattr(t, "det_class", None)
+                rec["score"][i] = score if score is not None else 0.0
+                rec["cls"][i] = _class_id(cls)
+            else:
+                rec["xyxy"][i] = t[:4]
+                rec["track_id"][i] = _track_id(t[4])
+        return rec
@@ -0,0 +1,210 @@
+# evidence_writer.py
+# 불법 적재 증거(이미지 + DB 행) 비동기 저장
+# - 탐지 루프는 submit()으로 크롭 이미지와 메타데이터만 넣고 바로 돌아감
+# - 백그라운드 스레드 하나가 JPEG 인코딩 → 임시 파일에 쓰고 os.replace (원자적 저장)
+#   → batch_size개 또는 flush_interval초마다 한 트랜잭션으로 INSERT
+# - 큐 길이/최대 길이/대기 시간을 기록하고, 큐가 차면 잠깐 기다린 뒤 버림 (dropped)
+import os
+import re
+import time
+import queue
+import threading
+from datetime import datetime
+import cv2
+from db_manager import get_db
+
+EVIDENCE_DIR = "Detection/evidence"
+BATCH_SIZE = 16
+FLUSH_INTERVAL = 0.2        # 첫 항목이 들어온 뒤 최대 대기(초)
+MAX_QUEUE = 256
+SUBMIT_TIMEOUT = 0.05       # 큐가 찼을 때 기다리는 시간(초)
+PRESSURE_WARN = 0.8         # 큐가 이 비율 이상 차면 경고
+CROP_PADDING = 0.5          # 박스 크기 대비 주변 여백 비율
+JPEG_QUALITY = 90
+
+
+def crop_with_padding(frame, box, padding=CROP_PADDING):
+    """박스 주변 여백까지 잘라 복사 → (crop, 크롭 안에서의 박스 좌표)"""
+    h, w = frame.shape[:2]
+    x1, y1, x2, y2 = [int(v) for v in box[:4]]
+    pad_x, pad_y = int((x2 - x1) * padding), int((y2 - y1) * padding)
+    cx1, cy1 = max(0, x1 - pad_x), max(0, y1 - pad_y)
+    cx2, cy2 = min(w, x2 + pad_x), min(h, y2 + pad_y)
+    # 프레임 버퍼는 재사용되므로 반드시 복사
+    crop = frame[cy1:cy2, cx1:cx2].copy()
+    return crop, (x1 - cx1, y1 - cy1, x2 - cx1, y2 - cy1)
+
+
+def _safe_name(text):
+    return re.sub(r'[\\/:*?"<>|\s\[\]]+', "_", str(text)).strip("_")
+
+
+class EvidenceWriter(threading.Thread):
+    def __init__(self, image_dir=EVIDENCE_DIR, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL,
+                 max_queue=MAX_QUEUE):
+        super().__init__(daemon=True)
+        self.image_dir = image_dir
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.running = True
+
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.duplicates = 0
+        self.batches = 0
+        self.max_depth = 0
+        self.last_latency_ms = 0.0
+
+    def submit(self, frame, box, track_id, cctvname, on_saved=None, session=None):
+        """크롭을 떠서 큐에 넣고 바로 반환 (큐가 계속 차 있으면 False)
+
+        session: track_id를 만든 트래커 세션 (StreamPipeline.session)
+        """
+        crop, rel_box = crop_with_padding(frame, box)
+        item = {
+            "crop": crop,
+            "bbox": ",".join(str(int(v)) for v in rel_box),     # 크롭 안에서의 박스 (VLM ROI용)
+            "track_id": track_id,
+            "cctvname": cctvname,
+            "session": session,
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "queued_at": time.monotonic(),
+            "on_saved": on_saved,
+        }
+        try:
+            self.queue.put(item, timeout=SUBMIT_TIMEOUT)
+        except queue.Full:
+            self.dropped += 1
+            print(f"⚠️ 증거 저장 큐가 가득 참 → 버림 (누적 {self.dropped})")
+            return False
+
+        self.submitted += 1
+        depth = self.queue.qsize()
+        self.max_depth = max(self.max_depth, depth)
+        if depth >= self.queue.maxsize * PRESSURE_WARN:
+            print(f"⚠️ 증거 저장 지연: 대기 {depth}/{self.queue.maxsize}")
+        return True
+
+    def _take_batch(self):
+        try:
+            first = self.queue.get(timeout=0.5)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write_image(self, item):
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        path = os.path.join(self.image_dir, f"{_safe_name(item['cctvname'])}_{item['track_id']}_{stamp}.jpg")
+        ok, buf = cv2.imencode(".jpg", item["crop"], [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+        if not ok:
+            raise IOError("JPEG 인코딩 실패")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(buf.tobytes())
+        os.replace(tmp_path, path)
+        return path
+
+    def _flush(self, batch):
+        rows = []
+        for item in batch:
+            try:
+                rows.append((item, self._write_image(item)))
+            except Exception as e:
+                self.failed += 1
+                print(f"❌ 증거 이미지 저장 실패: {e}")
+        if not rows:
+            return
+
+        saved, duplicates = [], []
+        with get_db().writer() as cursor:     # 한 트랜잭션으로 커밋
+            for item, path in rows:
+                # (cctvname, session, track_id)가 이미 있으면 무시 → 이미지도 지움
+                cursor.execute(
+                    "INSERT OR IGNORE INTO illegal_vehicles (timestamp, image_path, cctvname, session, track_id, bbox) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (item["timestamp"], path, item["cctvname"], item["session"], item["track_id"], item["bbox"]),
+                )
+                if cursor.rowcount:
+                    saved.append((item, cursor.lastrowid, path))
+                else:
+                    duplicates.append(path)
+        for path in duplicates:
+            self.duplicates += 1
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+        self.batches += 1
+        self.written += len(saved)
+        now = time.monotonic()
+        for item, rowid, path in saved:
+            self.last_latency_ms = (now - item["queued_at"]) * 1000
+            if item["on_saved"]:
+                item["on_saved"](rowid, item["timestamp"], path, item["cctvname"], item["track_id"])
+
+    def run(self):
+        os.makedirs(self.image_dir, exist_ok=True)
+        while self.running or not self.queue.empty():
+            batch = self._take_batch()
+            if batch:
+                try:
+                    self._flush(batch)
+                except Exception as e:
+                    self.failed += len(batch)
+                    print(f"❌ 증거 DB 저장 실패: {e}")
+
+    def stop(self):
+        """남은 항목을 모두 쓰고 종료"""
+        self.running = False
+
+    def stats(self):
+        depth = self.queue.qsize()
+        return {
+            "evidence_queued": depth,
+            "evidence_pressure": round(depth / self.queue.maxsize, 2),
+            "evidence_max_depth": self.max_depth,
+            "evidence_submitted": self.submitted,
+            "evidence_written": self.written,
+            "evidence_dropped": self.dropped,
+            "evidence_failed": self.failed,
+            "evidence_duplicates": self.duplicates,
+            "evidence_avg_batch": round(self.written / self.batches, 2) if self.batches else 0.0,
+            "evidence_latency_ms": round(self.last_latency_ms, 1),
+        }
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_evidence_writer():
+    """프로세스 전역 증거 저장 스레드 (처음 호출 시 시작)"""
+    global _writer
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = EvidenceWriter()
+            _writer.start()
+        return _writer
+
+
+def stop_evidence_writer(timeout=5.0):
+    global _writer
+    with _writer_lock:
+        if _writer is not None:
+            _writer.stop()
+            _writer.join(timeout)
+            _writer = None
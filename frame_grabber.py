@@ -0,0 +1,90 @@
+# frame_grabber.py
+# 캡처와 추론 분리
+# - FrameGrabber 스레드는 cv2.VideoCapture에서 계속 읽어 가장 최신 프레임 하나만 보관
+# - 추론 루프는 LatestFrameSlot에서 항상 제일 새 프레임만 가져감
+# - 추론이 느려도 OpenCV 내부 버퍼가 쌓이지 않으므로 지연이 일정하게 유지됨
+# - 연결 끊김/재연결은 StreamSupervisor가 담당
+import threading
+import time
+from stream_supervisor import StreamSupervisor
+
+STALE_AFTER = 1.0       # 이보다 오래된 프레임은 추론하지 않음(초)
+
+
+class LatestFrameSlot:
+    """최신 프레임 1장만 담는 슬롯 (새 프레임이 오면 안 읽은 이전 프레임은 버림)"""
+
+    def __init__(self, stale_after=STALE_AFTER):
+        self.stale_after = stale_after
+        self._cond = threading.Condition()
+        self._frame = None
+        self._captured_at = 0.0
+        self._seq = 0
+        self._consumed_seq = 0
+        self.closed = False
+
+        self.produced = 0
+        self.dropped = 0    # 읽히기 전에 덮어써진 프레임
+        self.stale = 0      # 너무 오래돼서 버린 프레임
+
+    def put(self, frame, captured_at=None):
+        with self._cond:
+            if self._frame is not None and self._consumed_seq < self._seq:
+                self.dropped += 1
+            self._frame = frame
+            self._captured_at = captured_at if captured_at is not None else time.monotonic()
+            self._seq += 1
+            self.produced += 1
+            self._cond.notify_all()
+
+    def get(self, last_seq=0, timeout=None):
+        """last_seq 이후의 새 프레임을 기다렸다가 (seq, frame, captured_at) 반환
+
+        시간 초과, 슬롯 닫힘, 오래된 프레임이면 frame은 None
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq > last_seq or self.closed, timeout):
+                return last_seq, None, 0.0
+            if self._seq <= last_seq:
+                return last_seq, None, 0.0
+
+            seq, frame, captured_at = self._seq, self._frame, self._captured_at
+            self._consumed_seq = seq
+            if time.monotonic() - captured_at > self.stale_after:
+                self.stale += 1
+                return seq, None, captured_at
+            return seq, frame, captured_at
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {"produced": self.produced, "dropped": self.dropped, "stale": self.stale}
+
+
+class FrameGrabber(threading.Thread):
+    def __init__(self, stream_url, slot=None, resolve_url=None, on_state=None):
+        super().__init__(daemon=True)
+        self.slot = slot or LatestFrameSlot()
+        self._stop_event = threading.Event()
+        self.stream = StreamSupervisor(stream_url, resolve_url=resolve_url,
+                                       on_state=on_state, stop_event=self._stop_event)
+
+    def run(self):
+        try:
+            if not self.stream.open():
+                return
+            while not self._stop_event.is_set() and self.stream.cap is not None:
+                ret, frame = self.stream.read()
+                if not ret:
+                    continue
+                self.slot.put(frame, time.monotonic())
+        finally:
+            self.stream.release()
+            self.slot.close()
+
+    def stop(self):
+        self._stop_event.set()
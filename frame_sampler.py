@@ -0,0 +1,108 @@
+# frame_sampler.py
+# 스트림별 적응형 추론 주기 스케줄러
+# - 장면이 비어 있으면 idle_fps (낮은 주기)
+# - 추적 중인 차량이 있으면 active_fps
+# - 불법 적재 후보(illegal box)가 보이면 boost_fps로 올리고 boost_hold초 동안 유지
+# 25fps 영상이라도 실제 YOLO 추론은 초당 몇 번만 돌게 됨
+# process 모드에서는 워커 스레드(should_infer)와 결과 수신 스레드(update/mark_skipped)가 같이 쓰므로 락으로 보호
+import time
+import threading
+from collections import deque
+
+IDLE_FPS = 1.0
+ACTIVE_FPS = 3.0
+BOOST_FPS = 8.0
+BOOST_HOLD = 2.0        # 후보가 사라진 뒤에도 boost 유지하는 시간(초)
+FPS_WINDOW = 5.0        # 실효 추론 fps 계산 구간(초)
+
+
+class FrameSampler:
+    def __init__(self, idle_fps=IDLE_FPS, active_fps=ACTIVE_FPS, boost_fps=BOOST_FPS,
+                 boost_hold=BOOST_HOLD, clock=time.monotonic):
+        self.idle_fps = idle_fps
+        self.active_fps = active_fps
+        self.boost_fps = boost_fps
+        self.boost_hold = boost_hold
+        self.clock = clock
+
+        self.mode = "idle"
+        self.last_infer = None
+        self.boost_until = 0.0
+        self.frames_seen = 0
+        self.frames_inferred = 0
+        self.frames_gated = 0
+        self.frames_unsent = 0
+        self._infer_times = deque()
+        self._lock = threading.Lock()
+
+    def target_fps(self):
+        if self.mode == "boost":
+            return self.boost_fps
+        if self.mode == "active":
+            return self.active_fps
+        return self.idle_fps
+
+    def should_infer(self):
+        """이번 프레임에 추론할지 결정 (True면 추론 시각으로 기록)"""
+        with self._lock:
+            now = self.clock()
+            self.frames_seen += 1
+            if self.last_infer is not None and now - self.last_infer < 1.0 / self.target_fps():
+                return False
+
+            self.last_infer = now
+            self.frames_inferred += 1
+            self._infer_times.append(now)
+            while self._infer_times and now - self._infer_times[0] > FPS_WINDOW:
+                self._infer_times.popleft()
+            return True
+
+    def _undo_infer(self):
+        if self._infer_times:
+            self._infer_times.pop()
+        self.frames_inferred -= 1
+
+    def mark_skipped(self):
+        """should_infer()가 True였지만 MotionGate가 거른 경우 (주기 타이머는 그대로 둠)"""
+        with self._lock:
+            self._undo_infer()
+            self.frames_gated += 1
+
+    def mark_unsent(self):
+        """should_infer()가 True였지만 탐지 프로세스로 보내지 못한 경우 (슬롯 부족, 탐지 프로세스 종료)"""
+        with self._lock:
+            self._undo_infer()
+            self.frames_unsent += 1
+
+    def update(self, num_tracks, num_candidates):
+        """추론 결과를 보고 다음 주기 결정"""
+        with self._lock:
+            now = self.clock()
+            if num_candidates > 0:
+                self.boost_until = now + self.boost_hold
+
+            if now < self.boost_until:
+                self.mode = "boost"
+            elif num_tracks > 0:
+                self.mode = "active"
+            else:
+                self.mode = "idle"
+
+    def effective_fps(self):
+        """최근 FPS_WINDOW초 동안 실제 추론한 횟수 기준 fps"""
+        with self._lock:
+            if len(self._infer_times) < 2:
+                return 0.0
+            span = self.clock() - self._infer_times[0]
+            return len(self._infer_times) / max(span, 1.0 / self.target_fps(), 1e-6)
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "target_fps": self.target_fps(),
+            "effective_fps": round(self.effective_fps(), 2),
+            "frames_seen": self.frames_seen,
+            "frames_inferred": self.frames_inferred,
+            "frames_gated": self.frames_gated,
+            "frames_unsent": self.frames_unsent,
+        }
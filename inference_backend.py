@@ -0,0 +1,133 @@
+# inference_backend.py
+# 탐지 모델 추론 백엔드 선택
+# - cuda      : 기존 방식 (torch + GPU)
+# - onnx      : YOLOv8 가중치를 ONNX로 export 후 ONNX Runtime(CPU / OpenVINO EP)으로 실행
+# - torch-cpu : GPU, onnxruntime 둘 다 없을 때 쓰는 torch CPU 경로
+# 어떤 백엔드든 Detection.detector.detect_vehicles(model, frame)에 그대로 넘길 수 있는
+# 모델 객체를 돌려줌 (ultralytics YOLO는 .onnx 파일도 같은 인터페이스로 로드함)
+import os
+import numpy as np
+from Detection.detector import load_model
+
+BACKEND_ENV = "DETECTION_BACKEND"       # cuda / onnx / torch-cpu 강제 지정용
+THREADS_ENV = "DETECTION_CPU_THREADS"
+ONNX_IMGSZ = 640
+
+
+def default_cpu_threads():
+    """intra-op 스레드 수 (기본: 논리 코어의 절반 ≒ 물리 코어 수)"""
+    value = os.getenv(THREADS_ENV)
+    if value:
+        return max(1, int(value))
+    return max(1, (os.cpu_count() or 2) // 2)
+
+
+def cuda_available():
+    try:
+        import torch
+        return torch.cuda.is_available()
+    except ImportError:
+        return False
+
+
+def onnxruntime_available():
+    try:
+        import onnxruntime  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class TorchBackend:
+    def __init__(self, device="cpu", num_threads=None):
+        self.device = device
+        self.name = "cuda" if device.startswith("cuda") else "torch-cpu"
+        self.num_threads = num_threads or default_cpu_threads()
+
+    def load(self, path):
+        if self.name == "torch-cpu":
+            import torch
+            torch.set_num_threads(self.num_threads)
+        return load_model(path).to(self.device)
+
+    def release(self):
+        if self.name == "cuda":
+            import torch
+            torch.cuda.empty_cache()
+
+
+class OnnxBackend:
+    name = "onnx"
+
+    def __init__(self, num_threads=None, imgsz=ONNX_IMGSZ):
+        self.num_threads = num_threads or default_cpu_threads()
+        self.imgsz = imgsz
+
+    def export(self, path):
+        """.pt → .onnx 변환 (이미 최신 .onnx가 있으면 재사용)"""
+        onnx_path = os.path.splitext(path)[0] + ".onnx"
+        if os.path.exists(onnx_path) and os.path.getmtime(onnx_path) >= os.path.getmtime(path):
+            return onnx_path
+        print(f"🔧 ONNX 변환 중: {path} → {onnx_path}")
+        # dynamic=True: BatchInferenceScheduler가 여러 장을 한 번에 넣을 수 있게 배치 축을 열어둠
+        exported = load_model(path).export(format="onnx", imgsz=self.imgsz, simplify=True, dynamic=True)
+        return str(exported) if exported else onnx_path
+
+    def providers(self):
+        import onnxruntime as ort
+        available = ort.get_available_providers()
+        # OpenVINO EP가 설치돼 있으면 우선 사용 (인텔 CPU 엣지 박스)
+        return [p for p in ("OpenVINOExecutionProvider", "CPUExecutionProvider") if p in available]
+
+    def session_options(self):
+        import onnxruntime as ort
+        opts = ort.SessionOptions()
+        opts.intra_op_num_threads = self.num_threads
+        opts.inter_op_num_threads = 1
+        opts.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        return opts
+
+    def load(self, path):
+        import onnxruntime as ort
+        onnx_path = self.export(path)
+        model = load_model(onnx_path)
+
+        # 한 번 돌려서 predictor를 만든 뒤, 기본 세션을 스레드 수를 맞춘 세션으로 교체
+        model.predict(np.zeros((self.imgsz, self.imgsz, 3), dtype=np.uint8), verbose=False)
+        backend = getattr(getattr(model, "predictor", None), "model", None)
+        if backend is not None and hasattr(backend, "session"):
+            backend.session = ort.InferenceSession(
+                onnx_path, sess_options=self.session_options(), providers=self.providers()
+            )
+        return model
+
+    def release(self):
+        pass
+
+
+def get_backend(name):
+    if name == "cuda":
+        return TorchBackend("cuda")
+    if name == "onnx":
+        return OnnxBackend()
+    if name == "torch-cpu":
+        return TorchBackend("cpu")
+    raise ValueError(f"알 수 없는 백엔드: {name}")
+
+
+def select_backend_name():
+    """하드웨어/설치된 패키지를 보고 백엔드 이름 결정 (환경변수로 강제 가능)"""
+    forced = os.getenv(BACKEND_ENV)
+    if forced:
+        return forced
+    if cuda_available():
+        return "cuda"
+    if onnxruntime_available():
+        return "onnx"
+    return "torch-cpu"
+
+
+def load_detection_model(path, backend=None):
+    """백엔드를 골라 모델을 로드 (풀을 쓰지 않는 스크립트용)"""
+    return get_backend(backend or select_backend_name()).load(path)
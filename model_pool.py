@@ -0,0 +1,146 @@
+# model_pool.py
+# 프로세스 전체에서 공유하는 탐지 모델 저장소
+# - 모델은 (경로, 백엔드)마다 한 번만 로드 + 더미 추론으로 워밍업
+# - DetectionWorker는 acquire()로 핸들을 빌리고 release()로 반납 (참조 카운트)
+# - 참조가 0이 되어도 바로 내리지 않음 → 채널 전환 시 재로딩 없음
+# - 메모리를 비우려면 unload()를 명시적으로 호출
+import threading
+import numpy as np
+from Detection.detector import detect_vehicles
+from inference_backend import get_backend, select_backend_name
+
+MODEL_PATH = "Detection/model/yolov8_n.pt"
+WARMUP_SHAPE = (640, 640, 3)
+
+
+class ModelHandle:
+    """풀에서 빌린 모델 핸들 (with 문으로도 사용 가능)"""
+
+    def __init__(self, pool, key, model):
+        self.pool = pool
+        self.key = key
+        self.model = model
+        self.released = False
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.pool.release(self)
+
+    def __enter__(self):
+        return self.model
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class ModelPool:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}      # key -> {"model", "refcount", "ready"(Event)}
+        self._default_backend = None
+
+    def default_backend(self):
+        # 백엔드는 처음 한 번만 결정 (cuda → onnx → torch-cpu)
+        if self._default_backend is None:
+            self._default_backend = select_backend_name()
+            print(f"🧩 탐지 백엔드: {self._default_backend}")
+        return self._default_backend
+
+    def _load(self, path, backend):
+        model = get_backend(backend).load(path)
+        # 🔹 더미 프레임으로 한 번 추론해서 커널/메모리 할당을 미리 끝내둠
+        dummy = np.zeros(WARMUP_SHAPE, dtype=np.uint8)
+        detect_vehicles(model, dummy)
+        return model
+
+    def _get_entry(self, path, backend):
+        backend = backend or self.default_backend()
+        key = (path, backend)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = {"model": None, "refcount": 0, "ready": threading.Event(), "error": None}
+                self._entries[key] = entry
+                owner = True
+            else:
+                owner = False
+
+        # 처음 요청한 스레드만 로드, 나머지는 로드가 끝날 때까지 대기
+        if owner:
+            try:
+                entry["model"] = self._load(path, backend)
+            except Exception as e:
+                entry["error"] = e
+                with self._lock:
+                    self._entries.pop(key, None)
+            finally:
+                entry["ready"].set()
+        else:
+            entry["ready"].wait()
+
+        if entry["error"] is not None:
+            raise entry["error"]
+        return key, entry
+
+    def preload(self, path=MODEL_PATH, backend=None):
+        """앱 시작 시 미리 로드 + 워밍업 (참조 카운트는 올리지 않음)"""
+        self._get_entry(path, backend)
+
+    def preload_async(self, path=MODEL_PATH, backend=None):
+        """GUI 스레드를 막지 않도록 백그라운드에서 preload"""
+        t = threading.Thread(target=self.preload, args=(path, backend), daemon=True)
+        t.start()
+        return t
+
+    def acquire(self, path=MODEL_PATH, backend=None):
+        key, entry = self._get_entry(path, backend)
+        with self._lock:
+            entry["refcount"] += 1
+        return ModelHandle(self, key, entry["model"])
+
+    def release(self, handle):
+        with self._lock:
+            entry = self._entries.get(handle.key)
+            if entry and entry["refcount"] > 0:
+                entry["refcount"] -= 1
+
+    def refcount(self, path=MODEL_PATH, backend=None):
+        with self._lock:
+            entry = self._entries.get((path, backend or self.default_backend()))
+            return entry["refcount"] if entry else 0
+
+    def unload(self, path=MODEL_PATH, backend=None, force=False):
+        """모델을 메모리에서 내림. 사용 중이면 force=True일 때만 내림"""
+        backend = backend or self.default_backend()
+        key = (path, backend)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not entry["ready"].is_set():
+                return False
+            if entry["refcount"] > 0 and not force:
+                return False
+            del self._entries[key]
+
+        entry["model"] = None
+        get_backend(backend).release()
+        return True
+
+    def unload_all(self):
+        with self._lock:
+            keys = list(self._entries.keys())
+        for path, backend in keys:
+            self.unload(path, backend, force=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_model_pool():
+    """프로세스 전역 ModelPool (싱글톤)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ModelPool()
+        return _pool
@@ -0,0 +1,99 @@
+# motion_gate.py
+# YOLO 추론 전에 거는 가벼운 필터
+# - 작게 줄인 흑백 프레임의 해시가 직전 프레임과 같으면 → 멈춘(frozen) 영상
+# - 마지막으로 추론한 프레임과 비교해 바뀐 픽셀 비율이 작으면 → 변화 없음(static)
+# - 둘 다 추론을 건너뛰지만, max_skip초마다 한 번은 강제로 추론
+# 카메라별 민감도는 motion_settings.json으로 조정 가능
+#   {"default": {"min_changed_ratio": 0.002}, "[서해안선] 서평택": {"pixel_threshold": 35}}
+import os
+import json
+import time
+import hashlib
+import cv2
+import numpy as np
+
+SETTINGS_PATH = "motion_settings.json"
+DEFAULT_SETTINGS = {
+    "enabled": True,
+    "width": 160,               # 비교용 축소 폭(px)
+    "pixel_threshold": 25,      # 이 이상 밝기 차이가 나면 바뀐 픽셀
+    "min_changed_ratio": 0.002, # 바뀐 픽셀 비율이 이보다 작으면 변화 없음
+    "max_skip": 10.0,           # 최대 연속 스킵 시간(초)
+}
+
+
+def load_camera_settings(cctvname, path=SETTINGS_PATH):
+    """기본값 ← 파일의 default ← 파일의 카메라별 설정 순으로 덮어씀"""
+    settings = dict(DEFAULT_SETTINGS)
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        settings.update(data.get("default", {}))
+        settings.update(data.get(cctvname, {}))
+    return settings
+
+
+class MotionGate:
+    def __init__(self, enabled=True, width=160, pixel_threshold=25,
+                 min_changed_ratio=0.002, max_skip=10.0, clock=time.monotonic):
+        self.enabled = enabled
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.min_changed_ratio = min_changed_ratio
+        self.max_skip = max_skip
+        self.clock = clock
+
+        self.reference = None       # 마지막으로 추론한 프레임 (축소본)
+        self.last_hash = None
+        self.last_pass = 0.0
+
+        self.checked = 0
+        self.passed = 0
+        self.skipped_static = 0
+        self.skipped_frozen = 0
+
+    @classmethod
+    def for_camera(cls, cctvname, path=SETTINGS_PATH):
+        return cls(**load_camera_settings(cctvname, path))
+
+    def _prepare(self, frame):
+        h, w = frame.shape[:2]
+        small = cv2.resize(frame, (self.width, max(1, h * self.width // w)), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def check(self, frame):
+        """추론이 필요하면 True, 건너뛰어도 되면 False"""
+        if not self.enabled:
+            return True
+
+        now = self.clock()
+        self.checked += 1
+        gray = self._prepare(frame)
+        digest = hashlib.blake2b(gray.tobytes(), digest_size=8).digest()
+        frozen = digest == self.last_hash
+        self.last_hash = digest
+
+        if self.reference is not None and now - self.last_pass < self.max_skip:
+            if frozen:
+                self.skipped_frozen += 1
+                return False
+            if self.reference.shape == gray.shape:
+                diff = cv2.absdiff(gray, self.reference)
+                changed = np.count_nonzero(diff > self.pixel_threshold) / diff.size
+                if changed < self.min_changed_ratio:
+                    self.skipped_static += 1
+                    return False
+
+        self.reference = gray
+        self.last_pass = now
+        self.passed += 1
+        return True
+
+    def stats(self):
+        return {
+            "gate_checked": self.checked,
+            "gate_passed": self.passed,
+            "skipped_static": self.skipped_static,
+            "skipped_frozen": self.skipped_frozen,
+        }
@@ -0,0 +1,111 @@
+# stream_supervisor.py
+# cv2.VideoCapture 감시
+# - read() 실패 시 바로 재시도하지 않고 잠깐 쉼 (CPU 100% 점유 방지)
+# - 연속 실패가 쌓이면 지수 백오프로 다시 연결
+# - 두 번째 재연결부터는 resolve_url()로 새 cctvurl을 받아옴 (ITS 토큰 만료 대비)
+# - 상태 변화(live / reconnecting / dead)는 on_state 콜백으로 알림
+import random
+import threading
+import cv2
+
+LIVE = "live"
+RECONNECTING = "reconnecting"
+DEAD = "dead"
+
+MAX_READ_FAILURES = 25      # 이만큼 연속 실패하면 재연결
+READ_RETRY_DELAY = 0.04     # read 실패 후 대기(초)
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+MAX_RECONNECTS = 8          # 재연결 시도 횟수 (넘으면 dead)
+
+
+class StreamSupervisor:
+    def __init__(self, url, resolve_url=None, on_state=None, stop_event=None,
+                 max_failures=MAX_READ_FAILURES, max_reconnects=MAX_RECONNECTS):
+        self.url = url
+        self.resolve_url = resolve_url
+        self.on_state = on_state
+        self.stop_event = stop_event or threading.Event()
+        self.max_failures = max_failures
+        self.max_reconnects = max_reconnects
+
+        self.cap = None
+        self.state = None
+        self.failures = 0
+        self.reconnects = 0
+
+    def _set_state(self, state):
+        if state != self.state:
+            self.state = state
+            print(f"📡 스트림 상태: {state} ({self.url})")
+            if self.on_state:
+                self.on_state(state)
+
+    def _open(self, url):
+        cap = cv2.VideoCapture(url)
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        if cap.isOpened():
+            return cap
+        cap.release()
+        return None
+
+    def _release(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+    def _refresh_url(self):
+        try:
+            new_url = self.resolve_url()
+        except Exception as e:
+            print(f"⚠️ CCTV URL 재조회 실패: {e}")
+            return
+        if new_url and new_url != self.url:
+            print(f"🔄 CCTV URL 갱신: {new_url}")
+            self.url = new_url
+
+    def open(self):
+        self.cap = self._open(self.url)
+        if self.cap is None:
+            return self.reconnect()
+        return True
+
+    def reconnect(self):
+        """지수 백오프로 재연결. 실패하거나 중지되면 False"""
+        self._set_state(RECONNECTING)
+        self._release()
+        for attempt in range(self.max_reconnects):
+            delay = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)) * random.uniform(0.8, 1.2)
+            if self.stop_event.wait(delay):
+                return False
+            if attempt >= 1 and self.resolve_url:
+                self._refresh_url()
+
+            self.reconnects += 1
+            self.cap = self._open(self.url)
+            if self.cap is not None:
+                self.failures = 0
+                return True
+
+        self._set_state(DEAD)
+        return False
+
+    def read(self):
+        if self.cap is None:
+            return False, None
+
+        ret, frame = self.cap.read()
+        if ret:
+            self.failures = 0
+            self._set_state(LIVE)
+            return True, frame
+
+        self.failures += 1
+        if self.failures >= self.max_failures or not self.cap.isOpened():
+            self.reconnect()
+        else:
+            self.stop_event.wait(READ_RETRY_DELAY)
+        return False, None
+
+    def release(self):
+        self._release()
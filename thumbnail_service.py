@@ -0,0 +1,117 @@
+# thumbnail_service.py
+# 탐지 목록 썸네일 (GUI 스레드에서 원본 JPEG를 통째로 디코딩하지 않도록)
+# - get(path): 메모리 캐시(QPixmapCache, 크기 제한 = LRU)에 있으면 바로 반환, 없으면 None 반환 후 백그라운드 요청
+# - 백그라운드(QThreadPool): 디스크 캐시(경로 + mtime 키) 확인 → 없으면 QImageReader.setScaledSize로
+#   축소 디코딩 → 디스크 캐시에 저장 → ready(path) 시그널
+# - QPixmap은 GUI 스레드에서만 만들 수 있으므로 작업 스레드는 QImage까지만 만듦
+import os
+import hashlib
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, QSize, pyqtSignal
+from PyQt5.QtGui import QImage, QImageReader, QPixmap, QPixmapCache, QColor
+
+THUMB_DIR = "Detection/thumbnails"
+THUMB_SIZE = QSize(60, 40)
+MEMORY_CACHE_KB = 8 * 1024      # 60x40 썸네일 약 800개
+WORKERS = 2
+
+
+def read_scaled(path, size):
+    """size 안에 들어가도록 비율 유지 축소 디코딩 (JPEG는 디코딩 단계에서 줄여 읽음)"""
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    original = reader.size()
+    if original.isValid():
+        reader.setScaledSize(original.scaled(size, Qt.KeepAspectRatio))
+    return reader.read()
+
+
+def _disk_cache_path(path, thumb_dir=THUMB_DIR):
+    mtime = os.stat(path).st_mtime_ns
+    key = hashlib.sha1(f"{os.path.abspath(path)}:{mtime}".encode("utf-8")).hexdigest()
+    return os.path.join(thumb_dir, f"{key}.png")
+
+
+class _Signals(QObject):
+    done = pyqtSignal(str, QImage)
+
+
+class _ThumbnailJob(QRunnable):
+    def __init__(self, path, size, thumb_dir, signals):
+        super().__init__()
+        self.path = path
+        self.size = size
+        self.thumb_dir = thumb_dir
+        self.signals = signals
+
+    def run(self):
+        image = QImage()
+        try:
+            cached = _disk_cache_path(self.path, self.thumb_dir)
+            if os.path.exists(cached):
+                image.load(cached)
+            if image.isNull():
+                image = read_scaled(self.path, self.size)
+                if not image.isNull():
+                    tmp_path = cached + ".tmp.png"
+                    if image.save(tmp_path):
+                        os.replace(tmp_path, cached)
+        except OSError as e:
+            print(f"⚠️ 썸네일 생성 실패: {self.path} ({e})")
+        self.signals.done.emit(self.path, image)
+
+
+class ThumbnailService(QObject):
+    ready = pyqtSignal(str)     # 썸네일이 메모리 캐시에 들어간 이미지 경로
+
+    def __init__(self, size=THUMB_SIZE, thumb_dir=THUMB_DIR, workers=WORKERS, parent=None):
+        super().__init__(parent)
+        self.size = size
+        self.thumb_dir = thumb_dir
+        os.makedirs(thumb_dir, exist_ok=True)
+        QPixmapCache.setCacheLimit(max(QPixmapCache.cacheLimit(), MEMORY_CACHE_KB))
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(workers)
+        self._signals = _Signals()
+        self._signals.done.connect(self._on_done)   # 작업 스레드 → GUI 스레드 (queued)
+        self._pending = set()
+        self._failed = set()    # 읽을 수 없는 파일은 다시 시도하지 않음
+
+        self.placeholder = QPixmap(size)
+        self.placeholder.fill(QColor("#dddddd"))
+
+        self.hits = 0
+        self.misses = 0
+        self.failed = 0
+
+    def _key(self, path):
+        return f"thumb:{self.size.width()}x{self.size.height()}:{path}"
+
+    def get(self, path):
+        """캐시된 썸네일 또는 None (None이면 백그라운드에서 만들고 ready로 알림)"""
+        pixmap = QPixmapCache.find(self._key(path))
+        if pixmap is not None:
+            self.hits += 1
+            return pixmap
+        self.misses += 1
+        if path not in self._pending and path not in self._failed:
+            self._pending.add(path)
+            self.pool.start(_ThumbnailJob(path, self.size, self.thumb_dir, self._signals))
+        return None
+
+    def _on_done(self, path, image):
+        self._pending.discard(path)
+        if image.isNull():
+            self.failed += 1
+            self._failed.add(path)
+            return
+        QPixmapCache.insert(self._key(path), QPixmap.fromImage(image))
+        self.ready.emit(path)
+
+    def stats(self):
+        return {"thumb_hits": self.hits, "thumb_misses": self.misses, "thumb_failed": self.failed,
+                "thumb_pending": len(self._pending)}
+
+    def shutdown(self, timeout_ms=2000):
+        self.pool.clear()
+        self.pool.waitForDone(timeout_ms)
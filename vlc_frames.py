@@ -0,0 +1,288 @@
+# vlc_frames.py
+# VLC 하나로만 디코딩해서 화면 표시와 탐지가 같은 프레임을 공유
+# - libvlc 메모리 비디오 콜백(video_set_format_callbacks / video_set_callbacks)으로
+#   VLC가 디코딩한 프레임을 우리가 미리 잡아둔 numpy 버퍼에 바로 쓰게 함
+# - DetectionWorker는 SharedFrameBuffer.get()으로 BGR 뷰를 받음 (복사 없음)
+# - VideoSurface는 같은 버퍼를 QImage로 감싸서 그림 (복사 없음)
+# - 기존처럼 cv2.VideoCapture로 URL을 한 번 더 열지 않아도 됨
+# - 끊김/재연결은 VlcStreamSupervisor가 담당 (cv2 경로의 StreamSupervisor와 같은 백오프/URL 재조회)
+import ctypes
+import time
+import random
+import threading
+import numpy as np
+import vlc
+from PyQt5.QtWidgets import QWidget
+from PyQt5.QtCore import Qt, QObject, QTimer, QRect, pyqtSignal
+from PyQt5.QtGui import QImage, QPainter
+from frame_grabber import LatestFrameSlot, STALE_AFTER
+from stream_supervisor import LIVE, RECONNECTING, DEAD, BACKOFF_BASE, BACKOFF_MAX, MAX_RECONNECTS
+
+CHROMA = b"RV32"        # 메모리상 B,G,R,X 순서 → [:, :, :3]이 그대로 BGR
+NUM_BUFFERS = 5         # 쓰는 중 1 + 최신 1 + 소비자(탐지, 화면) 각 1 + 여유 1
+RENDER_INTERVAL = 33    # 화면 갱신 주기(ms)
+WATCHDOG_INTERVAL = 1000    # 새 프레임 확인 주기(ms)
+NO_FRAME_TIMEOUT = 10.0     # 이 시간 동안 새 프레임이 없으면 재연결(초)
+
+
+class SharedFrameBuffer(LatestFrameSlot):
+    """VLC가 직접 쓰는 프레임 버퍼 풀 + 최신 프레임 슬롯
+
+    소비자(consumer)마다 마지막으로 받은 버퍼를 빌려둔 것으로 보고,
+    다음 get()을 호출할 때까지 VLC가 그 버퍼를 덮어쓰지 않음
+    """
+
+    def __init__(self, num_buffers=NUM_BUFFERS, stale_after=STALE_AFTER):
+        super().__init__(stale_after)
+        self.num_buffers = num_buffers
+        self.width = 0
+        self.height = 0
+        self._buffers = []
+        self._scratch = None
+        self._writing = None
+        self._latest_idx = None
+        self._leases = {}       # consumer -> 버퍼 인덱스
+
+    def allocate(self, width, height):
+        with self._cond:
+            self.width, self.height = width, height
+            self._buffers = [np.zeros((height, width, 4), dtype=np.uint8) for _ in range(self.num_buffers)]
+            self._scratch = np.zeros((height, width, 4), dtype=np.uint8)
+            self._writing = None
+            self._latest_idx = None
+            self._leases.clear()
+            self._frame = None
+
+    def begin_write(self):
+        """VLC lock 콜백: 아무도 안 쓰는 버퍼를 골라 돌려줌"""
+        with self._cond:
+            busy = {self._latest_idx, *self._leases.values()}
+            for idx in range(len(self._buffers)):
+                if idx not in busy:
+                    self._writing = idx
+                    return self._buffers[idx]
+            # 빈 버퍼가 없으면 이번 프레임은 버림
+            self._writing = None
+            self.dropped += 1
+            return self._scratch
+
+    def end_write(self):
+        """VLC display 콜백: 방금 쓴 버퍼를 최신 프레임으로 게시"""
+        with self._cond:
+            idx, self._writing = self._writing, None
+            if idx is None:
+                return
+            self._latest_idx = idx
+            self.put(self._buffers[idx][:, :, :3], time.monotonic())
+
+    def get(self, last_seq=0, timeout=None, consumer="detector"):
+        with self._cond:
+            self._leases.pop(consumer, None)
+            seq, frame, captured_at = super().get(last_seq, timeout)
+            if frame is not None:
+                self._leases[consumer] = self._latest_idx
+            return seq, frame, captured_at
+
+    def lease_latest(self, consumer="renderer"):
+        """화면용: 기다리지 않고 최신 BGRX 버퍼를 빌림 (탐지 쪽 카운터는 건드리지 않음)"""
+        with self._cond:
+            self._leases.pop(consumer, None)
+            if self._latest_idx is None:
+                return None
+            self._leases[consumer] = self._latest_idx
+            return self._buffers[self._latest_idx]
+
+
+class VlcFrameSource:
+    """MediaPlayer에 메모리 콜백을 연결해 SharedFrameBuffer를 채움"""
+
+    def __init__(self, player, shared=None):
+        self.player = player
+        self.shared = shared or SharedFrameBuffer()
+
+        # ctypes 콜백은 GC되지 않도록 속성으로 잡아둬야 함
+        self._format_cb = vlc.CallbackDecorators.VideoFormatCb(self._on_format)
+        self._cleanup_cb = vlc.CallbackDecorators.VideoCleanupCb(self._on_cleanup)
+        self._lock_cb = vlc.CallbackDecorators.VideoLockCb(self._on_lock)
+        self._unlock_cb = vlc.CallbackDecorators.VideoUnlockCb(self._on_unlock)
+        self._display_cb = vlc.CallbackDecorators.VideoDisplayCb(self._on_display)
+
+        player.video_set_format_callbacks(self._format_cb, self._cleanup_cb)
+        player.video_set_callbacks(self._lock_cb, self._unlock_cb, self._display_cb, None)
+
+    def _on_format(self, opaque, chroma, width, height, pitches, lines):
+        w, h = width[0], height[0]
+        ctypes.memmove(chroma, CHROMA, 4)
+        pitches[0] = w * 4
+        lines[0] = h
+        self.shared.allocate(w, h)
+        print(f"🖼 VLC 프레임 형식: {w}x{h} {CHROMA.decode()}")
+        return 1
+
+    def _on_cleanup(self, opaque):
+        pass
+
+    def _on_lock(self, opaque, planes):
+        buf = self.shared.begin_write()
+        planes[0] = buf.ctypes.data
+        return None
+
+    def _on_unlock(self, opaque, picture, planes):
+        pass
+
+    def _on_display(self, opaque, picture):
+        self.shared.end_write()
+
+
+class VlcStreamSupervisor(QObject):
+    """VLC 재생 감시 (GUI 스레드에서 동작)
+
+    - EncounteredError / EndReached 이벤트, 또는 NO_FRAME_TIMEOUT초 동안 새 프레임이 없으면 재연결
+    - 재연결은 지수 백오프, 두 번째 재연결부터는 resolve_url()로 새 cctvurl을 받아옴 (작업 스레드에서 조회)
+    - max_reconnects번 연속 실패하면 dead, 상태 변화는 on_state(live/reconnecting/dead)로 알림
+    """
+    _player_failed = pyqtSignal(str)        # VLC 이벤트 스레드 → GUI 스레드
+    _url_resolved = pyqtSignal(int, str)    # (세대, 새 URL) 조회 스레드 → GUI 스레드
+
+    def __init__(self, instance, player, shared, on_state=None, no_frame_timeout=NO_FRAME_TIMEOUT,
+                 max_reconnects=MAX_RECONNECTS, parent=None):
+        super().__init__(parent)
+        self.instance = instance
+        self.player = player
+        self.shared = shared
+        self.on_state = on_state
+        self.no_frame_timeout = no_frame_timeout
+        self.max_reconnects = max_reconnects
+
+        self.url = None
+        self.resolve_url = None
+        self.state = None
+        self.attempt = 0            # 마지막으로 프레임을 받은 뒤 재연결 시도 횟수
+        self.reconnects = 0
+        self._generation = 0        # play/stop마다 증가 → 이전 스트림의 늦은 콜백은 무시
+        self._reconnecting = False
+        self._last_produced = 0
+        self._last_frame_at = 0.0
+
+        events = player.event_manager()
+        events.event_attach(vlc.EventType.MediaPlayerEncounteredError, lambda e: self._player_failed.emit("error"))
+        events.event_attach(vlc.EventType.MediaPlayerEndReached, lambda e: self._player_failed.emit("end"))
+        self._player_failed.connect(self._on_failed)
+        self._url_resolved.connect(self._on_resolved)
+
+        self.watchdog = QTimer(self)
+        self.watchdog.setInterval(WATCHDOG_INTERVAL)
+        self.watchdog.timeout.connect(self._check_frames)
+
+    def _set_state(self, state):
+        if state != self.state:
+            self.state = state
+            print(f"📡 스트림 상태: {state} ({self.url})")
+            if self.on_state:
+                self.on_state(state)
+
+    def play(self, url, resolve_url=None):
+        self.stop()
+        self.url = url
+        self.resolve_url = resolve_url
+        self._open()
+        self.watchdog.start()
+
+    def _open(self):
+        self._reconnecting = False
+        self.player.stop()
+        self.player.set_media(self.instance.media_new(self.url))
+        self.player.play()
+        # 연결하는 동안도 NO_FRAME_TIMEOUT 안에 첫 프레임이 와야 함
+        self._last_produced = self.shared.produced
+        self._last_frame_at = time.monotonic()
+
+    def _check_frames(self):
+        if self._reconnecting:
+            return
+        produced = self.shared.produced
+        now = time.monotonic()
+        if produced != self._last_produced:
+            self._last_produced = produced
+            self._last_frame_at = now
+            self.attempt = 0
+            self._set_state(LIVE)
+        elif now - self._last_frame_at > self.no_frame_timeout:
+            self._on_failed("no frames")
+
+    def _on_failed(self, reason):
+        if self._reconnecting or self.url is None:
+            return
+        if self.attempt >= self.max_reconnects:
+            self.watchdog.stop()
+            self.player.stop()
+            self._set_state(DEAD)
+            return
+        self._reconnecting = True
+        self._set_state(RECONNECTING)
+        delay = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** self.attempt)) * random.uniform(0.8, 1.2)
+        self.attempt += 1
+        self.reconnects += 1
+        print(f"🔁 재연결 {self.attempt}/{self.max_reconnects} ({reason}, {delay:.1f}초 뒤)")
+        generation = self._generation
+        QTimer.singleShot(int(delay * 1000), lambda: self._reopen(generation))
+
+    def _reopen(self, generation):
+        if generation != self._generation:
+            return
+        if self.attempt >= 2 and self.resolve_url:
+            # ITS 목록 조회는 네트워크 요청 → GUI 스레드를 막지 않도록
+            threading.Thread(target=self._resolve, args=(generation,), daemon=True).start()
+        else:
+            self._open()
+
+    def _resolve(self, generation):
+        try:
+            new_url = self.resolve_url()
+        except Exception as e:
+            print(f"⚠️ CCTV URL 재조회 실패: {e}")
+            new_url = None
+        self._url_resolved.emit(generation, new_url or "")
+
+    def _on_resolved(self, generation, new_url):
+        if generation != self._generation:
+            return
+        if new_url and new_url != self.url:
+            print(f"🔄 CCTV URL 갱신: {new_url}")
+            self.url = new_url
+        self._open()
+
+    def stop(self):
+        self._generation += 1
+        self.watchdog.stop()
+        self._reconnecting = False
+        self.url = None
+        self.state = None
+        self.attempt = 0
+        self.player.stop()
+
+
+class VideoSurface(QWidget):
+    """SharedFrameBuffer의 최신 프레임을 그리는 위젯 (VLC 창 출력 대신 사용)"""
+
+    def __init__(self, shared, parent=None):
+        super().__init__(parent)
+        self.shared = shared
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.update)
+        self.timer.start(RENDER_INTERVAL)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.black)
+        buf = self.shared.lease_latest("renderer")
+        if buf is not None:
+            h, w = buf.shape[:2]
+            image = QImage(buf.data, w, h, w * 4, QImage.Format_RGB32)
+            scale = min(self.width() / w, self.height() / h)
+            tw, th = int(w * scale), int(h * scale)
+            target = QRect((self.width() - tw) // 2, (self.height() - th) // 2, tw, th)
+            painter.setRenderHint(QPainter.SmoothPixmapTransform)
+            painter.drawImage(target, image)
+        painter.end()
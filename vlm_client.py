@@ -0,0 +1,196 @@
+# vlm_client.py
+# VLM(OpenAI Responses API) 비동기 클라이언트
+# - 토큰 버킷으로 분당 요청 수를 API 한도(VLM_RPM)에 맞추고, 세마포어로 동시 요청 수 제한
+# - 요청마다 타임아웃, 429/5xx/연결 오류는 지터를 준 지수 백오프로 재시도 (Retry-After 헤더가 있으면 따름)
+# - on_delta를 주면 스트리밍으로 받아 텍스트 조각마다 호출 (이미 조각을 넘긴 뒤 실패하면 재시도하지 않음)
+# - 동기 코드(분석 작업 스레드)는 VlmClient로 호출: 백그라운드 이벤트 루프 하나를 모든 스레드가 공유
+import os
+import time
+import random
+import asyncio
+import threading
+import openai
+from openai import AsyncOpenAI
+
+VLM_RPM = float(os.getenv('VLM_RPM', '60'))                 # 분당 요청 한도
+VLM_BURST = int(os.getenv('VLM_BURST', '5'))                # 한 번에 몰아 보낼 수 있는 요청 수
+VLM_CONCURRENCY = int(os.getenv('VLM_CONCURRENCY', '8'))    # 동시에 진행 중인 요청 수
+VLM_TIMEOUT = float(os.getenv('VLM_TIMEOUT', '60'))         # 요청 하나 타임아웃(초)
+VLM_MAX_RETRIES = int(os.getenv('VLM_MAX_RETRIES', '4'))
+RETRY_BASE = 1.0
+RETRY_MAX = 30.0
+
+
+class TokenBucket:
+    """초당 rate개씩 채워지고 최대 capacity개까지 쌓이는 토큰 버킷 (대기는 들어온 순서대로)"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.waited = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+                self.waited += wait
+                await asyncio.sleep(wait)
+
+
+def _retryable(error):
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError, asyncio.TimeoutError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def _retry_after(error):
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class AsyncVlmClient:
+    def __init__(self, api_key=None, rpm=VLM_RPM, burst=VLM_BURST, concurrency=VLM_CONCURRENCY,
+                 timeout=VLM_TIMEOUT, max_retries=VLM_MAX_RETRIES):
+        # 재시도/타임아웃은 여기서 직접 관리
+        self.client = AsyncOpenAI(api_key=api_key, timeout=timeout, max_retries=0)
+        self.bucket = TokenBucket(rpm / 60.0, burst)
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.timeout = timeout
+        self.max_retries = max_retries
+
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.in_flight = 0
+        self.first_token_ms = 0.0
+        self.streamed = 0
+
+    async def _request(self, prompt, base64_image, model, on_delta):
+        kwargs = dict(
+            model=model,
+            input=[{
+                "role": "user",
+                "content": [
+                    {"type": "input_text", "text": prompt},
+                    {
+                        "type": "input_image",
+                        "image_url": f"data:image/jpeg;base64,{base64_image}",
+                    },
+                ],
+            }],
+        )
+        if on_delta is None:
+            response = await self.client.responses.create(**kwargs)
+            return response.output[0].content[0].text
+
+        started = time.perf_counter()
+        parts = []
+        stream = await self.client.responses.create(**kwargs, stream=True)
+        async for event in stream:
+            if event.type == "response.output_text.delta":
+                if not parts:
+                    self.streamed += 1
+                    self.first_token_ms += (time.perf_counter() - started) * 1000
+                parts.append(event.delta)
+                on_delta(event.delta)
+        return "".join(parts)
+
+    async def analyze(self, prompt, base64_image, model, on_delta=None):
+        """이미지 한 장 분석 → 응답 텍스트 (on_delta가 있으면 조각이 올 때마다 on_delta(조각))"""
+        attempt = 0
+        delivered = []
+
+        def forward(delta):
+            delivered.append(delta)
+            on_delta(delta)
+
+        while True:
+            await self.bucket.acquire()
+            try:
+                async with self.semaphore:
+                    self.requests += 1
+                    self.in_flight += 1
+                    try:
+                        return await asyncio.wait_for(
+                            self._request(prompt, base64_image, model, forward if on_delta else None), self.timeout)
+                    finally:
+                        self.in_flight -= 1
+            except Exception as e:
+                if not _retryable(e) or attempt >= self.max_retries or delivered:
+                    self.failures += 1
+                    raise
+                delay = _retry_after(e) or min(RETRY_MAX, RETRY_BASE * 2 ** attempt) * random.uniform(0.5, 1.5)
+                attempt += 1
+                self.retries += 1
+                print(f"⚠️ VLM 요청 재시도 {attempt}/{self.max_retries} ({delay:.1f}초 뒤): {e!r}")
+                await asyncio.sleep(delay)
+
+    def stats(self):
+        return {"vlm_requests": self.requests, "vlm_retries": self.retries, "vlm_failures": self.failures,
+                "vlm_in_flight": self.in_flight, "vlm_throttled_s": round(self.bucket.waited, 1),
+                "vlm_avg_first_token_ms": round(self.first_token_ms / self.streamed, 1) if self.streamed else 0.0}
+
+
+class VlmClient:
+    """동기 래퍼 – 백그라운드 스레드의 이벤트 루프에서 AsyncVlmClient를 실행"""
+
+    def __init__(self, **kwargs):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="vlm-client", daemon=True)
+        self.thread.start()
+        # asyncio 객체(Lock/Semaphore)가 이 루프에 묶이도록 루프 안에서 생성
+        self.client = self._run(self._create(kwargs))
+
+    @staticmethod
+    async def _create(kwargs):
+        return AsyncVlmClient(**kwargs)
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def analyze(self, prompt, base64_image, model, on_delta=None):
+        """호출한 스레드는 결과가 올 때까지 기다림 (여러 스레드가 동시에 불러도 됨)
+
+        on_delta는 이벤트 루프 스레드에서 호출되므로 Qt 시그널 발신처럼 스레드 안전한 일만 할 것
+        """
+        return self._run(self.client.analyze(prompt, base64_image, model, on_delta))
+
+    def stats(self):
+        return self.client.stats()
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=2.0)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_vlm_client(api_key=None):
+    """프로세스 전역 VlmClient"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = VlmClient(api_key=api_key)
+        return _client
+
+
+def vlm_stats():
+    """VlmClient 누적 통계 (아직 한 번도 호출 안 했으면 빈 dict – 클라이언트를 새로 만들지 않음)"""
+    with _client_lock:
+        return _client.stats() if _client is not None else {}
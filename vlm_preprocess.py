@@ -0,0 +1,106 @@
+# vlm_preprocess.py
+# VLM 업로드 전 이미지 줄이기
+# - 증거 이미지에서 차량 박스 + 주변 여백만 잘라냄 (박스는 증거 저장 시 illegal_vehicles.bbox에 기록)
+# - 긴 변을 VLM_MAX_EDGE로 줄이고 VLM_JPEG_QUALITY로 다시 인코딩 (결과가 더 크면 원본 그대로)
+# - 호출마다 원본/전송 바이트, 전처리 시간, API 응답 시간을 기록
+#   업로드 절약 시간은 VLM_UPLOAD_KBPS 기준 추정치
+import os
+import time
+import threading
+import cv2
+import numpy as np
+from evidence_writer import crop_with_padding
+
+VLM_MAX_EDGE = int(os.getenv('VLM_MAX_EDGE', '768'))
+VLM_JPEG_QUALITY = int(os.getenv('VLM_JPEG_QUALITY', '80'))
+VLM_CONTEXT_PADDING = float(os.getenv('VLM_CONTEXT_PADDING', '0.25'))  # 박스 크기 대비 주변 여백 비율
+VLM_UPLOAD_KBPS = float(os.getenv('VLM_UPLOAD_KBPS', '1000'))          # 절약 시간 추정용 업로드 속도
+
+
+def parse_bbox(text):
+    """'x1,y1,x2,y2' → (x1, y1, x2, y2), 없거나 잘못됐으면 None"""
+    try:
+        box = tuple(int(v) for v in text.split(","))
+    except (AttributeError, ValueError):
+        return None
+    return box if len(box) == 4 and box[2] > box[0] and box[3] > box[1] else None
+
+
+def signature(roi=None):
+    """전처리 설정 – 같은 이미지라도 보낸 내용이 다르면 캐시 키가 달라지도록"""
+    return f"{roi}:{VLM_MAX_EDGE}:{VLM_JPEG_QUALITY}:{VLM_CONTEXT_PADDING}"
+
+
+def prepare_image(image_bytes, roi=None, max_edge=VLM_MAX_EDGE, quality=VLM_JPEG_QUALITY,
+                  padding=VLM_CONTEXT_PADDING):
+    """→ (전송할 JPEG 바이트, 정보 dict)"""
+    start = time.perf_counter()
+    info = {"orig_bytes": len(image_bytes), "cropped": False, "scale": 1.0}
+    image = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        info.update(sent_bytes=len(image_bytes), prep_ms=(time.perf_counter() - start) * 1000)
+        return image_bytes, info
+
+    if roi is not None:
+        image, _ = crop_with_padding(image, roi, padding)
+        info["cropped"] = True
+
+    h, w = image.shape[:2]
+    scale = max_edge / max(h, w)
+    if scale < 1.0:
+        image = cv2.resize(image, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+        info["scale"] = round(scale, 3)
+
+    data = image_bytes
+    ok, buf = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if ok and (buf.size < len(image_bytes) or info["cropped"]):
+        data = buf.tobytes()
+    info.update(sent_bytes=len(data), prep_ms=(time.perf_counter() - start) * 1000)
+    return data, info
+
+
+class UploadMetrics:
+    """VLM 호출별 전송량/시간 누적"""
+
+    def __init__(self, upload_kbps=VLM_UPLOAD_KBPS):
+        self.upload_kbps = upload_kbps
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.orig_bytes = 0
+        self.sent_bytes = 0
+        self.prep_ms = 0.0
+        self.api_ms = 0.0
+
+    def estimated_saved_ms(self, saved_bytes):
+        return saved_bytes / 1024 / self.upload_kbps * 1000
+
+    def record(self, info, api_ms):
+        """호출 하나 기록 → 로그용 한 줄"""
+        saved = info["orig_bytes"] - info["sent_bytes"]
+        with self._lock:
+            self.calls += 1
+            self.orig_bytes += info["orig_bytes"]
+            self.sent_bytes += info["sent_bytes"]
+            self.prep_ms += info["prep_ms"]
+            self.api_ms += api_ms
+        pct = saved / info["orig_bytes"] * 100 if info["orig_bytes"] else 0.0
+        return (f"📦 VLM 업로드 {info['orig_bytes'] / 1024:.0f}KB → {info['sent_bytes'] / 1024:.0f}KB "
+                f"({pct:.0f}% 절약, 업로드 약 {self.estimated_saved_ms(saved):.0f}ms 절약 추정, "
+                f"전처리 {info['prep_ms']:.0f}ms, 응답 {api_ms:.0f}ms)")
+
+    def stats(self):
+        with self._lock:
+            saved = self.orig_bytes - self.sent_bytes
+            calls = self.calls or 1
+            return {
+                "vlm_calls": self.calls,
+                "vlm_orig_bytes": self.orig_bytes,
+                "vlm_sent_bytes": self.sent_bytes,
+                "vlm_saved_ratio": round(saved / self.orig_bytes, 2) if self.orig_bytes else 0.0,
+                "vlm_est_saved_ms": round(self.estimated_saved_ms(saved), 1),
+                "vlm_avg_prep_ms": round(self.prep_ms / calls, 1),
+                "vlm_avg_api_ms": round(self.api_ms / calls, 1),
+            }
+
+
+upload_metrics = UploadMetrics()